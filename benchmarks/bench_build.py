@@ -0,0 +1,65 @@
+"""Benchmark cAST build time on synthetic modules of growing size.
+
+Usage:
+    python3 -m benchmarks.bench_build [--sizes 10000 100000 1000000]
+
+Build time per node should stay flat while the module grows, i.e. cAST build is linear.
+"""
+import ast
+import gc
+import time
+from src.constants import Origin
+from src.visitor import Visitor
+
+# Statement used to grow synthetic modules and number of ast.AST nodes it adds to the tree:
+# Assign, Name, Store, Call, Name, Load, BinOp, Name, Load, Add, Constant
+STATEMENT = "var_{i} = len(var + {i})\n"
+NODES_PER_STATEMENT = 11
+
+
+def synthetic_module(num_nodes: int) -> str:
+    """Generate source code of a module with roughly num_nodes ast.AST nodes.
+
+    :param num_nodes: number of nodes wanted
+    :return: source code
+    """
+    return "".join(STATEMENT.format(i=i) for i in range(num_nodes // NODES_PER_STATEMENT))
+
+
+def count_nodes(tree: ast.AST) -> int:
+    return sum(1 for _ in ast.walk(tree))
+
+
+def bench_build(num_nodes: int) -> dict:
+    """Parse a synthetic module and time the construction of its cAST.
+
+    :param num_nodes: approximate size of the synthetic module
+    :return: dict with number of nodes, seconds spent and microseconds per node
+    """
+    tree = ast.parse(synthetic_module(num_nodes))
+    visitor = Visitor(inbuild_imports=Origin.Buildin_Functions.INBUILD, sys_imports=list())
+    # Cyclic GC passes grow with the live heap and would hide the scaling of the build itself.
+    gc.collect()
+    gc.disable()
+    start = time.perf_counter()
+    visitor.visit(tree)
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    nodes = count_nodes(tree)
+    return {'nodes': nodes, 'seconds': elapsed, 'us_per_node': elapsed / nodes * 1e6}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+    print("{:>10} {:>10} {:>12}".format("nodes", "seconds", "us/node"))
+    for size in args.sizes:
+        result = bench_build(size)
+        print("{nodes:>10} {seconds:>10.3f} {us_per_node:>12.2f}".format(**result))
+
+
+if __name__ == "__main__":
+    main()
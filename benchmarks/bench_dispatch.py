@@ -0,0 +1,100 @@
+"""Benchmark per node dispatch of the Visitor, in nodes per second.
+
+Usage:
+    python3 -m benchmarks.bench_dispatch [--source FILE] [--nodes 200000] [--repeat 5]
+
+Times, over every node of the source (a synthetic module by default):
+    - handler lookup: visit_ method name built per node as ast.NodeVisitor.visit() does, against the
+      lookup by class in Visitor.handlers
+    - naming: the former isinstance() chain of Groups.merge_by_group(), against the lookup by class
+    - build: whole cAST construction with Metadata.NONE
+"""
+import ast
+import gc
+import time
+from benchmarks.bench_build import synthetic_module
+from src.cAST import Groups
+from src.constants import Metadata, Origin
+from src.visitor import Visitor
+
+
+def legacy_merge_by_group(ast_node):
+    """Groups.merge_by_group() as it was before groups became a table."""
+    if isinstance(ast_node, ast.ImportFrom) or isinstance(ast_node, ast.Import):
+        return Groups.IMPORT_GROUP
+    elif isinstance(ast_node, ast.For) or isinstance(ast_node, ast.While):
+        return Groups.LOOP_GROUP
+    elif isinstance(ast_node, ast.Name) or isinstance(ast_node, ast.NameConstant):
+        return Groups.NAME_GROUP
+    return ast_node.__class__.__name__
+
+
+def best_rate(function, num_nodes: int, repeat: int) -> float:
+    """Best nodes per second of function over repeat runs."""
+    timings = list()
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+        gc.enable()
+    return num_nodes / min(timings)
+
+
+def bench_dispatch(source: str, repeat: int) -> dict:
+    import warnings
+    tree = ast.parse(source)
+    nodes = list(ast.walk(tree))
+    visitor = Visitor(inbuild_imports=Origin.Buildin_Functions.INBUILD, sys_imports=list(), metadata=Metadata.NONE)
+
+    def lookup_by_name():
+        for node in nodes:
+            getattr(visitor, 'visit_' + node.__class__.__name__, visitor.generic_visit)
+
+    def lookup_by_class():
+        handlers = visitor.handlers
+        for node in nodes:
+            handlers.get(node.__class__)
+
+    def name_by_isinstance():
+        for node in nodes:
+            legacy_merge_by_group(node)
+
+    def name_by_class():
+        for node in nodes:
+            Groups.merge_by_group(node)
+
+    def build():
+        Visitor(inbuild_imports=Origin.Buildin_Functions.INBUILD, sys_imports=list(),
+                metadata=Metadata.NONE).visit(ast.parse(source))
+
+    with warnings.catch_warnings():
+        # isinstance() against deprecated ast classes warns on recent python versions.
+        warnings.simplefilter('ignore', DeprecationWarning)
+        return {
+            'nodes': len(nodes),
+            'lookup': (best_rate(lookup_by_name, len(nodes), repeat), best_rate(lookup_by_class, len(nodes), repeat)),
+            'naming': (best_rate(name_by_isinstance, len(nodes), repeat), best_rate(name_by_class, len(nodes), repeat)),
+            'build': best_rate(build, len(nodes), repeat),
+        }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", help="python file to visit instead of a synthetic module")
+    parser.add_argument("--nodes", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    source = open(args.source).read() if args.source else synthetic_module(args.nodes)
+    result = bench_dispatch(source, args.repeat)
+    print("{} nodes, in nodes/second".format(result['nodes']))
+    print("handler lookup: by visit_ name {:>12,.0f}   by class {:>12,.0f}".format(*result['lookup']))
+    print("naming:         by isinstance {:>12,.0f}   by class {:>12,.0f}".format(*result['naming']))
+    print("build:          {:>12,.0f}".format(result['build']))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark memory held per cAST node.
+
+Usage:
+    python3 -m benchmarks.bench_memory [--nodes 1000000]
+
+Reports, measured with tracemalloc:
+    - bytes per node of a plain __dict__ based node against the __slots__ based cAST.Node
+    - bytes per node of a built cAST keeping the original ast.AST tree alive, and after release_ast()
+"""
+import ast
+import gc
+import tracemalloc
+from benchmarks.bench_build import synthetic_module
+from src.cAST import Node
+from src.constants import Origin, Metadata
+
+
+class DictNode:
+    """Same fields as cAST.Node, stored in a per-instance __dict__."""
+    def __init__(self, ast_node):
+        self.ast_node = ast_node
+        self.name = ast_node.__class__.__name__
+        self.is_default_attributes = None
+        self.attributes = None
+        self.metadata = None
+        self.parent = None
+        self.childs = list()
+
+
+def traced(function) -> tuple:
+    """Run function and get it's result and the bytes it left allocated."""
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def bench_node_classes(num_nodes: int) -> dict:
+    ast_node = ast.Pass()
+    sizes = dict()
+    for node_class in (DictNode, Node):
+        _, size = traced(lambda: [node_class(ast_node) for _ in range(num_nodes)])
+        sizes[node_class.__name__] = size / num_nodes
+    return sizes
+
+
+def bench_tree(num_nodes: int) -> dict:
+    from src.visitor import Visitor
+    source = synthetic_module(num_nodes)
+
+    def build():
+        tree = ast.parse(source)
+        visitor = Visitor(inbuild_imports=Origin.Buildin_Functions.INBUILD, sys_imports=list(),
+                          metadata=Metadata.NONE)
+        visitor.visit(tree)
+        return tree, visitor.get_custom_ast()
+
+    def build_and_release():
+        c_ast = build()[1]
+        c_ast.release_ast()
+        return c_ast
+
+    (_, c_ast), with_ast = traced(build)
+    nodes = sum(1 for _ in iter_nodes(c_ast.root))
+    del c_ast
+    _, released = traced(build_and_release)
+    return {'nodes': nodes, 'with_ast': with_ast / nodes, 'released': released / nodes}
+
+
+def iter_nodes(root):
+    nodes = [root]
+    while nodes:
+        node = nodes.pop()
+        yield node
+        nodes.extend(node.childs)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=1000000)
+    args = parser.parse_args()
+    classes = bench_node_classes(args.nodes)
+    print("bytes per node instance: __dict__ {DictNode:.1f}, __slots__ {Node:.1f}".format(**classes))
+    tree = bench_tree(args.nodes)
+    print("bytes per cAST node ({nodes} nodes): with ast.AST tree {with_ast:.1f}, "
+          "after release_ast() {released:.1f}".format(**tree))
+
+
+if __name__ == "__main__":
+    main()
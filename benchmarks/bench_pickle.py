@@ -0,0 +1,80 @@
+"""Benchmark size and load time of cAST pickles.
+
+Usage:
+    python3 -m benchmarks.bench_pickle [--nodes 200000] [--repeat 3]
+
+Compares, for a cAST built with full metadata:
+    - legacy: the whole object graph (ast.AST links, metadata, index), default protocol
+    - lean: cAST.__reduce__() flat preorder lists, highest protocol, as cAST.pickleify() writes
+"""
+import ast
+import copyreg
+import gc
+import io
+import pickle
+import time
+from benchmarks.bench_build import synthetic_module
+from src.cAST import cAST
+from src.constants import Origin, Metadata
+
+
+def legacy_dumps(c_ast) -> bytes:
+    """Pickle c_ast as cAST.pickleify() did before cAST.__reduce__(): attributes of every object."""
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, protocol=pickle.DEFAULT_PROTOCOL)
+    pickler.dispatch_table = copyreg.dispatch_table.copy()
+    pickler.dispatch_table[cAST] = lambda obj: (copyreg.__newobj__, (cAST,), obj.__dict__)
+    pickler.dump(c_ast)
+    return buffer.getvalue()
+
+
+def lean_dumps(c_ast) -> bytes:
+    return pickle.dumps(c_ast, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def best_time(function, repeat: int) -> float:
+    timings = list()
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+        gc.enable()
+    return min(timings)
+
+
+def bench_pickle(num_nodes: int, repeat: int) -> dict:
+    from src.visitor import Visitor
+    tree = ast.parse(synthetic_module(num_nodes))
+    visitor = Visitor(inbuild_imports=Origin.Buildin_Functions.INBUILD, sys_imports=list(), metadata=Metadata.FULL)
+    visitor.visit(tree)
+    c_ast = visitor.get_custom_ast()
+    results = dict()
+    for name, dumps in (('legacy', legacy_dumps), ('lean', lean_dumps)):
+        data = dumps(c_ast)
+        results[name] = {
+            'size': len(data),
+            'dump': best_time(lambda: dumps(c_ast), repeat),
+            'load': best_time(lambda: pickle.loads(data), repeat),
+        }
+    return results
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    results = bench_pickle(args.nodes, args.repeat)
+    for name, result in results.items():
+        print("{:<7} size {:>12,} bytes   dump {:.3f}s   load {:.3f}s".format(name, result['size'], result['dump'],
+                                                                        result['load']))
+    print("lean is {:.1f}x smaller and loads {:.1f}x faster".format(
+        results['legacy']['size'] / results['lean']['size'], results['legacy']['load'] / results['lean']['load']))
+
+
+if __name__ == "__main__":
+    main()
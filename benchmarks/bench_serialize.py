@@ -0,0 +1,102 @@
+"""Benchmark cAST JSON serialization: recursive Node.to_dict() + json.dumps against the
+iterative Node.iter_json() writing chunks straight to the output stream.
+
+Usage:
+    python3 -m benchmarks.bench_serialize [--nodes 1000000] [--depth 100000]
+
+Each method runs in it's own process so peak RSS (ru_maxrss) is not shared between them.
+"""
+import json
+import os
+import resource
+import sys
+import time
+from benchmarks.bench_build import synthetic_module
+from src.constants import Origin, Metadata
+
+METHODS = ["dict", "stream"]
+
+
+def current_rss() -> int:
+    """Resident set size of this process in KB (Linux only)."""
+    with open('/proc/self/statm') as file:
+        return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def build_wide(num_nodes: int):
+    import ast
+    from src.visitor import Visitor
+    visitor = Visitor(inbuild_imports=Origin.Buildin_Functions.INBUILD, sys_imports=list(), metadata=Metadata.NONE)
+    visitor.visit(ast.parse(synthetic_module(num_nodes)))
+    return visitor.get_custom_ast().root
+
+
+def build_deep(depth: int):
+    """Chain of depth nested nodes, deeper than what recursion allows."""
+    import ast
+    from src.cAST import Node
+    root = node = Node(ast.Module())
+    for _ in range(depth):
+        child = Node(ast.UnaryOp())
+        node.set_child(child)
+        node = child
+    return root
+
+
+def serialize(root, method: str, output) -> int:
+    """Serialize tree with given method and get number of characters written."""
+    if method == "dict":
+        text = json.dumps(root.to_dict())
+        output.write(text)
+        return len(text)
+    written = 0
+    for chunk in root.iter_json():
+        output.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def run(method: str, shape: str, size: int):
+    sys.setrecursionlimit(10000)
+    root = build_wide(size) if shape == "wide" else build_deep(size)
+    rss_before = current_rss()
+    with open(os.devnull, 'w') as output:
+        start = time.perf_counter()
+        try:
+            written = serialize(root, method, output)
+        except RecursionError:
+            print(json.dumps({'error': 'RecursionError'}))
+            return
+        elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'seconds': elapsed, 'mb_per_second': written / elapsed / 1e6,
+                      'peak_extra_mb': max(peak_rss - rss_before, 0) / 1024}))
+
+
+def main():
+    import argparse
+    import subprocess
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=1000000, help="size of the wide synthetic module")
+    parser.add_argument("--depth", type=int, default=100000, help="depth of the deep synthetic tree")
+    parser.add_argument("--run", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        method, shape, size = args.run
+        run(method, shape, int(size))
+        return
+    print("{:>6} {:>7} {:>10} {:>8} {:>15}".format("shape", "method", "seconds", "MB/s", "peak extra MB"))
+    for shape, size in (("wide", args.nodes), ("deep", args.depth)):
+        for method in METHODS:
+            command = [sys.executable, "-m", "benchmarks.bench_serialize", "--run", method, shape, str(size)]
+            result = json.loads(subprocess.run(command, stdout=subprocess.PIPE, check=True).stdout)
+            if 'error' in result:
+                print("{:>6} {:>7} {:>10}".format(shape, method, result.get('error')))
+                continue
+            print("{:>6} {:>7} {seconds:>10.3f} {mb_per_second:>8.1f} {peak_extra_mb:>15.1f}".format(
+                shape, method, **result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark CLI startup through python -X importtime and fail when it exceeds it's budget.
+
+Usage:
+    python3 -m benchmarks.bench_startup [--repeat 5] [--budget-import 20] [--budget-file 100]
+
+Scenarios, each run in a fresh interpreter:
+    - import: import src.cli, as done by run.py before parsing arguments
+    - file: python3 run.py -f tests/fast_sort.py, compressing a single file
+Import time of a scenario is the median, over the runs, of the cumulative time of every module imported
+after interpreter startup (site). Exits with status 1 when a median exceeds it's budget in milliseconds,
+or when a scenario imports a module it does not need.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+SCENARIOS = {
+    'import': ['-c', 'import src.cli'],
+    'file': ['run.py', '-f', os.path.join('tests', 'fast_sort.py'), '-o', os.devnull],
+}
+# Modules a scenario must not import
+UNNEEDED = {
+    'import': ['ast', 'logging', 'src.cAST_frontend', 'src.visitor', 'src.cAST', 'src.dataset'],
+    'file': ['src.eval', 'src.dataset', 'src.encoding', 'src.corpus', 'concurrent.futures', 'numpy', 'matplotlib'],
+}
+
+
+def import_times(arguments: list) -> dict:
+    """Run python -X importtime with arguments and get cumulative import time of top level modules.
+
+    :param arguments: arguments of the interpreter after -X importtime
+    :return: dict of microseconds by module name, modules of interpreter startup excluded
+    """
+    process = subprocess.run([sys.executable, '-X', 'importtime'] + arguments, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.PIPE, text=True, check=True)
+    times = dict()
+    started = False
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        if not name.startswith('  '):
+            if started:
+                times[name.strip()] = int(cumulative)
+            started = started or name.strip() == 'site'
+        elif started:
+            times.setdefault(name.strip(), 0)
+    return times
+
+
+def bench_startup(repeat: int) -> dict:
+    results = dict()
+    for scenario, arguments in SCENARIOS.items():
+        totals = list()
+        modules = set()
+        for _ in range(repeat):
+            times = import_times(arguments)
+            totals.append(sum(times.values()) / 1000)
+            modules.update(times)
+        results[scenario] = {
+            'milliseconds': statistics.median(totals),
+            'unneeded': [module for module in UNNEEDED.get(scenario) if module in modules],
+        }
+    return results
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-import", type=float, default=20.0)
+    parser.add_argument("--budget-file", type=float, default=100.0)
+    args = parser.parse_args()
+    budgets = {'import': args.budget_import, 'file': args.budget_file}
+    failed = False
+    for scenario, result in bench_startup(args.repeat).items():
+        over_budget = result['milliseconds'] > budgets.get(scenario)
+        print("{:<7} {:>8.1f} ms (budget {:.1f} ms){}".format(
+            scenario, result['milliseconds'], budgets.get(scenario), "  OVER BUDGET" if over_budget else ""))
+        if result['unneeded']:
+            print("        imports unneeded modules: {}".format(", ".join(result['unneeded'])))
+        failed = failed or over_budget or bool(result['unneeded'])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,79 @@
 import ast
-from src.constants import Output
+import logging
+from src.constants import Encoding, Output
 from src.logger import get_logger
 
 logger = get_logger('customAST')
 
 
 class Groups:
-    """Grouping of ast.AST Node entities"""
+    """Grouping of ast.AST Node entities.
+    Groups map ast.AST class names to the name their nodes get in the cAST, classes not mapped keeping
+    their own name. Deprecated constant classes (Num, Str, Bytes, NameConstant, Ellipsis) group
+    ast.Constant nodes by the type of their value, as isinstance() does for them.
+    Groups.DEFAULT is used until configure() is given other groups.
+    """
     IMPORT_GROUP = "Import"
     LOOP_GROUP = "Loop"
     NAME_GROUP = "Name"
+    DEFAULT = {
+        "Import": IMPORT_GROUP,
+        "ImportFrom": IMPORT_GROUP,
+        "For": LOOP_GROUP,
+        "While": LOOP_GROUP,
+        "Name": NAME_GROUP,
+        "NameConstant": NAME_GROUP,
+    }
+    CONSTANT_TYPES = {
+        "Num": (int, float, complex),
+        "Str": (str,),
+        "Bytes": (bytes,),
+        "NameConstant": (bool, type(None)),
+        "Ellipsis": (type(...),),
+    }
+    # Name of nodes by ast.AST class, and of ast.Constant nodes by type of value when grouped by it.
+    names = dict()
+    constant_names = None
+    groups = dict()
+
+    @staticmethod
+    def configure(groups: dict = None):
+        """Set groups used to name cAST nodes from now on.
+
+        :param groups: dict of group name by ast.AST class name. None for Groups.DEFAULT
+        :return:
+        """
+        import _ast
+        groups = Groups.DEFAULT if groups is None else groups
+        classes = {value.__name__: value for value in vars(_ast).values()
+                   if isinstance(value, type) and issubclass(value, ast.AST)}
+        unknown = set(groups) - set(classes) - set(Groups.CONSTANT_TYPES)
+        if unknown:
+            raise ValueError("Unknown ast.AST classes in groups: {}".format(", ".join(sorted(unknown))))
+        names = {node_class: groups.get(name, name) for name, node_class in classes.items()}
+        constant_names = None
+        if any(name in groups for name in Groups.CONSTANT_TYPES):
+            constant_names = dict()
+            for name, value_types in Groups.CONSTANT_TYPES.items():
+                for value_type in value_types:
+                    constant_names[value_type] = groups.get(name, names.get(ast.Constant))
+        Groups.names = names
+        Groups.constant_names = constant_names
+        Groups.groups = dict(groups)
+
+    @staticmethod
+    def get_groups() -> dict:
+        return Groups.groups
 
     @staticmethod
     def merge_by_group(ast_node):
-        if isinstance(ast_node, ast.ImportFrom) or isinstance(ast_node, ast.Import):
-            return Groups.IMPORT_GROUP
-        elif isinstance(ast_node, ast.For) or isinstance(ast_node, ast.While):
-            return Groups.LOOP_GROUP
-        elif isinstance(ast_node, ast.Name) or isinstance(ast_node, ast.NameConstant):
-            return Groups.NAME_GROUP
-        return ast_node.__class__.__name__
+        node_class = ast_node.__class__
+        if node_class is ast.Constant and Groups.constant_names is not None:
+            return Groups.constant_names.get(type(getattr(ast_node, 'value', None)), Groups.names.get(node_class))
+        return Groups.names.get(node_class) or node_class.__name__
+
+
+Groups.configure()
 
 
 class Node:
@@ -32,7 +86,11 @@ class Node:
         - self.metadata: extra information
         - self.parent: Node acting as it's parent
         - self.childs: list(Nodes) acting as it's childs
+    Nodes declare __slots__ instead of carrying a __dict__, and leafs share an empty tuple as childs
+    until a child is set, since cAST of large data-sets hold millions of them.
     """
+    __slots__ = ('ast_node', 'name', 'is_default_attributes', 'attributes', 'metadata', 'parent', 'childs')
+
     def __init__(self, ast_node):
         self.ast_node = ast_node
         self.name = Groups.merge_by_group(ast_node)
@@ -40,7 +98,7 @@ class Node:
         self.attributes = None
         self.metadata = None
         self.parent = None
-        self.childs = list()
+        self.childs = ()
 
     def get_ast_node(self):
         return self.ast_node
@@ -66,7 +124,10 @@ class Node:
     def set_child(self, child):
         assert isinstance(child, Node)
         child.set_parent(self)
-        self.childs.append(child)
+        if self.childs:
+            self.childs.append(child)
+        else:
+            self.childs = [child]
 
     def set_is_default_attributes(self, is_default_attributes):
         self.is_default_attributes = is_default_attributes
@@ -74,20 +135,6 @@ class Node:
     def get_is_default_attributes(self):
         return self.is_default_attributes
 
-    def look_down(self, node):
-        """Traverse downside cAST in order to find node.
-
-        :param node: node to find
-        :return: Node or None if not found
-        """
-        if node == self.ast_node:
-            return self
-        for child in self.childs:
-            found = child.look_down(node)
-            if isinstance(found, Node):
-                return found
-        return None
-
     def print_subtree(self, indentation=0):
         """Print representation of self down to all it's leafs."""
         print("-"*indentation + repr(self.ast_node))
@@ -119,12 +166,84 @@ class Node:
                 node_as_list.extend(node_childs)
         return {"CAST_type": self.name, "CAST_body": node_as_list}
 
+    def get_body_attributes(self) -> tuple:
+        """Attributes placed in CAST_body of self, as in to_dict().
+
+        :return: list of attributes, bool telling if childs follow them
+        """
+        if self.attributes:
+            if self.is_default_attributes:
+                body = list()
+                [body.extend(attribute) for attribute in self.attributes]
+                return body, False
+            elif isinstance(self.attributes, list):
+                return self.attributes, True
+            elif isinstance(self.attributes, dict):
+                return [self.attributes], True
+        return [], True
+
+    def iter_json(self, separators=(', ', ': ')):
+        """Serialize self down to all it's leafs as the JSON document json.dumps(self.to_dict()) gives.
+        Nodes are traversed with an explicit stack, so neither the recursion limit nor an intermediate
+        dict of the whole tree are involved.
+
+        :param separators: (item_separator, key_separator) as in json.dumps()
+        :return: generator of str chunks, one per node and separator
+        """
+        import json
+        item_separator, key_separator = separators
+        encode = json.JSONEncoder(separators=separators).encode
+        node_start = "{" + encode("CAST_type") + key_separator
+        body_start = item_separator + encode("CAST_body") + key_separator + "["
+        node_end = "]}"
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+                continue
+            attributes, with_childs = node.get_body_attributes()
+            yield node_start + encode(node.name) + body_start + item_separator.join(map(encode, attributes))
+            stack.append(node_end)
+            if with_childs:
+                for position in range(len(node.childs) - 1, -1, -1):
+                    stack.append(node.childs[position])
+                    if position or attributes:
+                        stack.append(item_separator)
+
 
 class cAST:
-    """custom AST (cAST) object"""
+    """custom AST (cAST) object.
+    Keeps an index from each ast.AST node to the Node created for it. ast.AST does not
+    override __eq__/__hash__, so the index is keyed by identity.
+    Appearances of each node name (entities) and number of nodes at each depth (depths) are
+    counted as nodes are registered, so reports do not need to traverse the tree again.
+    Subtrees equal to a previous one may be held once, see Visitor.share_subtree(): shared_nodes counts
+    the nodes saved that way, while counters keep counting every node of the tree. Shared nodes have no
+    parent link then, and such a cAST can not be pruned.
+    """
     def __init__(self, root):
         assert(isinstance(root, Node))
         self.root = root
+        self.nodes = dict()
+        self.entities = dict()
+        self.depths = list()
+        self.shared_nodes = 0
+        self.register_node(root)
+
+    def register_node(self, node: Node, depth: int = 0):
+        """Index node by it's ast.AST node so find_node() does not need to traverse the tree, and count it.
+        ast.AST singletons (Load, Store, Add...) keep the first Node registered for them.
+
+        :param node: Node to index
+        :param depth: depth of node, 0 being the root
+        :return:
+        """
+        self.nodes.setdefault(node.get_ast_node(), node)
+        self.entities[node.name] = self.entities.get(node.name, 0) + 1
+        while len(self.depths) <= depth:
+            self.depths.append(0)
+        self.depths[depth] += 1
 
     def find_node(self, node) -> Node:
         """Find node in cAST.
@@ -132,41 +251,202 @@ class cAST:
         :param node: Node to find
         :return: node or None if not found
         """
-        return self.root.look_down(node)
+        return self.nodes.get(node)
+
+    def release_ast(self):
+        """Drop links from cAST nodes to their ast.AST nodes, together with the index, so the original
+        tree can be garbage collected while the cAST is kept. find_node() finds nothing afterwards.
+        Shared subtrees are walked once.
+
+        :return:
+        """
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            if node.ast_node is None:
+                continue
+            node.ast_node = None
+            nodes.extend(node.childs)
+        self.nodes.clear()
+
+    def prune(self, node: Node, depth: int, name: str) -> 'cAST':
+        """Detach the subtree of node as a cAST of it's own. A leaf with the same node name and a name
+        attribute takes it's place, so the remaining tree still tells what was there.
+        Counters of self and the index are updated for the detached nodes, and so are the ones of the new
+        cAST, whose index only holds it's root.
+
+        :param node: Node of self to detach, with it's childs
+        :param depth: depth of node in self
+        :param name: name of the function or class node stands for
+        :return: cAST rooted at node
+        """
+        if self.shared_nodes:
+            raise ValueError("cAST with shared subtrees can not be pruned")
+        stub = Node.__new__(Node)
+        stub.ast_node = node.ast_node
+        stub.name = node.name
+        stub.is_default_attributes = False
+        stub.attributes = [{"name": name}]
+        stub.metadata = None
+        stub.childs = ()
+        parent = node.parent
+        if parent is not None:
+            stub.parent = parent
+            parent.childs[parent.childs.index(node)] = stub
+            node.parent = None
+        else:
+            stub.parent = None
+            self.root = stub
+        if self.nodes.get(node.ast_node) is node:
+            self.nodes[node.ast_node] = stub
+        chunk = cAST(node)
+        stack = [(child, 1) for child in node.childs]
+        while stack:
+            child, child_depth = stack.pop()
+            if self.nodes.get(child.ast_node) is child:
+                del self.nodes[child.ast_node]
+            self.entities[child.name] -= 1
+            if not self.entities[child.name]:
+                del self.entities[child.name]
+            self.depths[depth + child_depth] -= 1
+            chunk.register_node(child, child_depth)
+            stack.extend((grandchild, child_depth + 1) for grandchild in child.childs)
+        while self.depths and not self.depths[-1]:
+            self.depths.pop()
+        chunk.nodes.clear()
+        chunk.nodes[node.ast_node] = node
+        return chunk
+
+    def __reduce__(self):
+        """Pickle cAST as flat preorder lists of node names, attributes behaviours, attributes and parent
+        positions. ast.AST links, metadata and the index are left out, and no recursion is involved
+        whatever the depth of the tree. Parent and child links are rebuilt by cAST.from_state() on load.
+
+        :return: (callable, arguments) as expected by pickle
+        """
+        names, is_default_attributes, attributes, parents = list(), list(), list(), list()
+        stack = [(self.root, Encoding.NO_PARENT)]
+        while stack:
+            node, parent = stack.pop()
+            position = len(names)
+            names.append(node.name)
+            is_default_attributes.append(node.is_default_attributes)
+            attributes.append(node.attributes)
+            parents.append(parent)
+            stack.extend((child, position) for child in reversed(node.childs))
+        return cAST.from_state, (names, is_default_attributes, attributes, parents)
+
+    @staticmethod
+    def from_state(names: list, is_default_attributes: list, attributes: list, parents: list):
+        """Rebuild a cAST pickled by cAST.__reduce__(). Nodes have no ast.AST link, like after release_ast().
+
+        :param names: name of each node, in preorder
+        :param is_default_attributes: attributes behaviour of each node
+        :param attributes: attributes of each node
+        :param parents: position of the parent of each node, Encoding.NO_PARENT for the root
+        :return: cAST
+        """
+        nodes = list()
+        depths = list()
+        for name, is_default, node_attributes, parent in zip(names, is_default_attributes, attributes, parents):
+            node = Node.__new__(Node)
+            node.ast_node = None
+            node.name = name
+            node.is_default_attributes = is_default
+            node.attributes = node_attributes
+            node.metadata = None
+            node.childs = ()
+            if parent == Encoding.NO_PARENT:
+                node.parent = None
+                depths.append(0)
+            else:
+                node.parent = nodes[parent]
+                nodes[parent].set_child(node)
+                depths.append(depths[parent] + 1)
+            nodes.append(node)
+        c_ast = cAST(nodes[0])
+        for node, depth in zip(nodes[1:], depths[1:]):
+            c_ast.register_node(node, depth)
+        c_ast.nodes.clear()
+        return c_ast
 
     def print_tree(self):
         """Print full tree with Node representations"""
         self.root.print_subtree()
 
-    def jsonify(self, file_name):
+    def jsonify(self, file_name, compact=False, return_string=False):
         """Build tree as json and retrieve it in demanded output.
         Possible outputs:
             - System Out
-            - File
+            - File, written through a buffer of Output.BUFFER_SIZE bytes
 
-        :param file_name: File to output. Can be path or Output.Location.SYSTEM_OUT
-        :return:
+        :param file_name: File to output. Can be path, Output.Location.SYSTEM_OUT or None for no output
+        :param compact: use separators without whitespace
+        :param return_string: also build and return the whole JSON document
+        :return: JSON document if return_string, else None
         """
-        import json
+        import sys
 
-        json_custom_ast = json.dumps(self.root.to_dict())
-        logger.debug(json_custom_ast)
+        separators = Output.COMPACT_SEPARATORS if compact else Output.SEPARATORS
         if file_name is Output.Location.SYSTEM_OUT:
-            print(json_custom_ast)
+            stream = sys.stdout
         elif file_name:
-            file = open(file_name, 'w')
-            json.dump(json_custom_ast, file)
-            file.close()
-        return json_custom_ast
+            stream = open(file_name, 'w', encoding='utf-8', buffering=Output.BUFFER_SIZE)
+        else:
+            stream = None
+        if stream is None and not return_string:
+            return None
+        chunks = list()
+        try:
+            for chunk in self.root.iter_json(separators):
+                if stream:
+                    stream.write(chunk)
+                if return_string:
+                    chunks.append(chunk)
+            if stream is sys.stdout:
+                stream.write("\n")
+        finally:
+            if stream and stream is not sys.stdout:
+                stream.close()
+        if return_string:
+            json_custom_ast = "".join(chunks)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(json_custom_ast)
+            return json_custom_ast
+        return None
+
+    def npzify(self, file_name):
+        """Encode cAST as integer arrays and save them in a .npz file. Needs numpy.
+        Node names and attribute keys are ids of src.encoding.get_vocabulary().
+
+        :param file_name: path to file with npz representation of cAST
+        :return:
+        """
+        from src.encoding import encode, save_npz
+
+        save_npz(encode(self), file_name)
+
+    def corpusify(self, file_name, name: str = ''):
+        """Encode cAST as integer arrays and append them to a corpus file, created if missing.
+        See src.corpus for the layout of corpus files.
+
+        :param file_name: path to corpus file
+        :param name: name of the record, for instance path of the source file
+        :return:
+        """
+        from src.corpus import CorpusWriter
+        from src.encoding import encode
+
+        with CorpusWriter(file_name, append=True) as corpus:
+            corpus.append(encode(self), name)
 
     def pickleify(self, file_name):
-        """Create cAST pickle and dump it in file.
+        """Create cAST pickle, in it's reduced form (see cAST.__reduce__()), and dump it in file.
 
         :param file_name: path to file pickle representation of cAST
         :return:
         """
         import pickle
 
-        file = open(file_name, 'wb')
-        pickle.dump(self, file)
-        file.close()
\ No newline at end of file
+        with open(file_name, 'wb', buffering=Output.BUFFER_SIZE) as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
\ No newline at end of file
@@ -1,6 +1,6 @@
-from ast import *
-from src.constants import Output, Mode
-from src.eval import analyse
+import ast
+import logging
+from src.constants import Chunks, Output, Mode, Metadata
 from src.logger import get_logger
 from src.visitor import Visitor
 
@@ -8,99 +8,178 @@ from src.visitor import Visitor
 logger = get_logger('cAST-frontend')
 
 
-def compress(file: str, filename: str, mode: str, output_type: str, output_file: str, report: bool, dataset_path: str):
+def compress(file: str, filename: str, mode: str, output_type: str, output_file: str, report: bool, dataset_path: str,
+             metadata: str = Metadata.FULL, compact: bool = False, share_subtrees: bool = False):
     if dataset_path:
-        __analyse_dataset(dataset_path)
+        from src.dataset import analyse_dataset
+        analyse_dataset(dataset_path)
         return
-    import ast2json
-    import json
-    inbuild_imp, sys_imp = get_imports(filename, '/python\d\.\d/')
-    logger.debug("Found following potential in-build imports: '{}'".format(inbuild_imp))
-    logger.debug("Found following potential sys imports: '{}'".format(sys_imp))
-    visitor = Visitor(inbuild_imports=inbuild_imp, sys_imports=sys_imp)
-    tree: AST = parse(file, filename=filename, mode=mode)
-    my_file = open(filename)
-    original_ast = json.dumps(ast2json.str2json(my_file.read()))
-    my_file.close()
-    logger.debug("Original ast ast='{}'".format(original_ast))
-    visitor.visit(tree)
-    c_ast = visitor.get_custom_ast()
+    tree, c_ast = build(file, filename, mode, metadata, share_subtrees=share_subtrees)
     if output_type == Output.Format.JSON:
-        custom_ast = c_ast.jsonify(output_file)
+        c_ast.jsonify(output_file, compact=compact)
     elif output_type == Output.Format.PICKLE:
         c_ast.pickleify(output_file)
+    elif output_type == Output.Format.NPZ:
+        c_ast.npzify(output_file)
+    elif output_type == Output.Format.CORPUS:
+        c_ast.corpusify(output_file, filename)
     if report:
-        evaluation = analyse(original_ast, custom_ast)
-        logger.debug(evaluation)
+        from src.eval import analyse
+        evaluation = analyse(tree, c_ast)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(evaluation)
         return evaluation
 
 
-def get_imports(file_path: str, to_match: str) -> list:
-    import modulefinder
-    import re
+def compress_many(sources, mode: str = Mode.EXEC, metadata: str = Metadata.NONE, output_type: str = None,
+                  report: bool = False, compact: bool = False, resolve_user: bool = False,
+                  share_subtrees: bool = False):
+    """Compress many sources held in memory, one after the other, yielding results as they are ready.
+    Origin tables and the vocabulary are loaded once and shared by every source, and nothing is read
+    from disk for the sources themselves. Sources failing to be compressed are yielded with None results.
+
+    :param sources: iterable of (name, source) tuples, source being str or bytes
+    :param mode: compiler mode, one of Mode.get_attr()
+    :param metadata: metadata kept in cAST nodes, one of Metadata.get_attr()
+    :param output_type: None to get the cAST itself, without it's ast.AST links. Otherwise one of
+                        Output.Format.get_attr(): JSON document (str), pickle (bytes), arrays of
+                        src.encoding.encode() (dict) or corpus record named after the source (bytes)
+    :param report: also get the comparison analysis between AST and cAST
+    :param compact: JSON output without whitespace between items
+    :param resolve_user: names are paths, and modules next to them are user imports
+    :param share_subtrees: hold equal subtrees once, see build(). Only worth it when cAST are kept
+    :return: generator of (name, result, report) tuples, report being None when not asked
+    """
+    for name, source in sources:
+        try:
+            tree, c_ast = build(source, name, mode, metadata, resolve_user=resolve_user,
+                                share_subtrees=share_subtrees)
+        except Exception as e:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Skipped '{}': {}".format(name, e))
+            yield name, None, None
+            continue
+        evaluation = None
+        if report:
+            from src.eval import analyse
+            evaluation = analyse(tree, c_ast)
+        del tree
+        c_ast.release_ast()
+        yield name, to_output(c_ast, output_type, name, compact), evaluation
+
+
+def to_output(c_ast, output_type: str = None, name: str = '', compact: bool = False):
+    """Serialize c_ast in memory, see compress_many().
+
+    :param c_ast: cAST to serialize
+    :param output_type: None or one of Output.Format.get_attr()
+    :param name: name of corpus records
+    :param compact: JSON output without whitespace between items
+    :return: c_ast, str, bytes or dict depending on output_type
+    """
+    if output_type is None:
+        return c_ast
+    elif output_type == Output.Format.JSON:
+        separators = Output.COMPACT_SEPARATORS if compact else Output.SEPARATORS
+        return "".join(c_ast.root.iter_json(separators))
+    elif output_type == Output.Format.PICKLE:
+        import pickle
+        return pickle.dumps(c_ast, protocol=pickle.HIGHEST_PROTOCOL)
+    elif output_type == Output.Format.NPZ:
+        from src.encoding import encode
+        return encode(c_ast)
+    elif output_type == Output.Format.CORPUS:
+        from src.corpus import pack_record
+        from src.encoding import encode
+        return pack_record(encode(c_ast), name)
+    raise ValueError("Unknown output type '{}'".format(output_type))
+
+
+def compress_chunks(file: str, filename: str, mode: str, output_type: str, output_file: str,
+                    metadata: str = Metadata.NONE, compact: bool = False):
+    """Compress source code as one cAST per function and class, then one for the code left outside them,
+    named Chunks.MODULE. Each cAST is written as soon as it's subtree is visited and dropped, so memory
+    is bounded by the largest function or class instead of by the whole file. Possible outputs:
+        - Output.Format.JSON: JSON Lines records with the path, qualified name and cAST of each chunk
+        - Output.Format.CORPUS: corpus records named after the path and qualified name of each chunk
+
+    :param file: source code
+    :param filename: path of source code
+    :param mode: compiler mode, one of Mode.get_attr()
+    :param output_type: Output.Format.JSON or Output.Format.CORPUS
+    :param output_file: path to output file, Output.Location.SYSTEM_OUT for JSON Lines on stdout
+    :param metadata: metadata kept in cAST nodes, one of Metadata.get_attr()
+    :param compact: JSON output without whitespace between items
+    :return:
+    """
+    import json
+    import sys
+    if output_type == Output.Format.CORPUS:
+        from src.corpus import CorpusWriter
+        from src.encoding import encode
+        output = CorpusWriter(output_file, append=True)
+
+        def write(name, c_ast):
+            output.append(encode(c_ast), filename + Chunks.SEPARATOR + name)
+    elif output_type == Output.Format.JSON:
+        separators = Output.COMPACT_SEPARATORS if compact else Output.SEPARATORS
+        prefix = '{"path": ' + json.dumps(filename) + ', "name": '
+        if output_file is Output.Location.SYSTEM_OUT:
+            output = sys.stdout
+        else:
+            output = open(output_file, 'w', encoding='utf-8', buffering=Output.BUFFER_SIZE)
+
+        def write(name, c_ast):
+            output.write(prefix + json.dumps(name) + ', "cast": ')
+            output.writelines(c_ast.root.iter_json(separators))
+            output.write('}\n')
+    else:
+        raise ValueError("Output type '{}' can not be written by chunks".format(output_type))
+    try:
+        _, c_ast = build(file, filename, mode, metadata, chunk_handler=write)
+        write(Chunks.MODULE, c_ast)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def build(file, filename: str, mode: str, metadata: str = Metadata.FULL, resolve_user: bool = True,
+          chunk_handler=None, share_subtrees: bool = False) -> tuple:
+    """Parse source code and build it's cAST.
+
+    :param file: source code, as str or bytes
+    :param filename: path of source code
+    :param mode: compiler mode, one of Mode.get_attr()
+    :param metadata: metadata kept in cAST nodes, one of Metadata.get_attr()
+    :param resolve_user: look for user modules next to filename. False when filename is only a name
+    :param chunk_handler: None, or called with the qualified name and cAST of each function and class, which
+                          are pruned from the returned cAST. See Visitor
+    :param share_subtrees: hold equal subtrees once, only without metadata and without chunk_handler.
+                           Shared nodes have no parent and the cAST can not be pruned. See Visitor
+    :return: parsed ast.AST tree, cAST
+    """
+    tree: ast.AST = ast.parse(file, filename=filename, mode=mode)
+    inbuild_imp, sys_imp, user_imp = get_imports(tree, filename if resolve_user else None)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Found following potential in-build imports: '{}'".format(inbuild_imp))
+        logger.debug("Found following potential sys imports: '{}'".format(sys_imp))
+        logger.debug("Found following potential user imports: '{}'".format(user_imp))
+    visitor = Visitor(inbuild_imports=inbuild_imp, sys_imports=sys_imp, user_imports=user_imp, metadata=metadata,
+                      chunk_handler=chunk_handler, share_subtrees=share_subtrees)
+    visitor.visit(tree)
+    return tree, visitor.get_custom_ast()
+
+
+def get_imports(tree: ast.AST, file_path: str) -> tuple:
+    """Get names which origin is known for the given file.
+    Only import statements of the file are resolved, against the interpreter wide OriginResolver.
+
+    :param tree: parsed file
+    :param file_path: path of parsed file, None to not look for user modules
+    :return: in-build names, system names, user names
+    """
     from src.constants import Origin
-    sys = list()
+    from src.origin import get_resolver
     native = Origin.Buildin_Functions.INBUILD
-    modfind = modulefinder.ModuleFinder()
-    modfind.run_script(file_path)
-    pattern = re.compile(to_match)
-    for k, v in modfind.modules.items():
-        if pattern.search(str(v.__file__)):
-            sys.append(k)
-    return native, sys
-
-
-def __analyse_dataset(path_dataset):
-    import os
-    import matplotlib.pyplot as plt
-
-    names = list()
-    dataset_ast_nodes = [0]
-    dataset_cast_nodes = [0]
-    dataset_ast_entities = [0]
-    dataset_cast_entities = [0]
-    pos = 0
-    for filename in os.listdir(path_dataset):
-        if filename.endswith(".py"):
-            pos += 1
-            file_path = path_dataset + filename
-            file = open(file_path, 'r').read()
-            try:
-                eval = compress(
-                    file=file,
-                    filename=file_path,
-                    mode=Mode.EXEC,
-                    output_type=Output.Format.JSON,
-                    output_file=None,
-                    report=True,
-                    dataset_path=None
-                )
-                names.append(file_path)
-                eval_ast = eval.get('ast')
-                eval_cast = eval.get('cast')
-
-                dataset_ast_entities.append(dataset_ast_entities[-1] + eval_ast.get('total_entities'))
-                dataset_cast_entities.append(dataset_cast_entities[-1] + eval_cast.get('total_entities'))
-                dataset_ast_nodes.append(dataset_ast_nodes[-1] + eval_ast.get('total_nodes'))
-                dataset_cast_nodes.append(dataset_cast_nodes[-1] + eval_cast.get('total_nodes'))
-
-                if len(names) == 10000:
-                    plt.plot(dataset_ast_nodes, label='AST')
-                    plt.plot(dataset_cast_nodes, label='custom AST')
-                    plt.legend()
-                    plt.ylabel("Number of nodes visited in data-set")
-                    plt.xlabel("Number of files analysed")
-                    plt.title("Nodes shown in data-set and analysed\n by DeepCode")
-                    plt.show()
-                    plt.plot(dataset_ast_entities, label='AST')
-                    plt.plot(dataset_cast_entities, label='custom AST')
-                    plt.legend()
-                    plt.ylabel("Number of entities visited in data-set")
-                    plt.xlabel("Total of files analysed")
-                    plt.title("Entities shown in data-set and analysed\n by DeepCode")
-                    plt.show()
-            except Exception as e:
-                logger.debug(e)
-                pass
-        else:
-            continue
+    system, user = get_resolver().resolve_imports(tree, file_path)
+    return native, system, user
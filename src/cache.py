@@ -0,0 +1,123 @@
+import os
+from src.constants import Cache
+
+
+def get_cache_dir() -> str:
+    """Directory where cAST keeps it's persistent caches.
+    Can be changed through the environment variable named by Cache.ENVIRONMENT.
+
+    :return: path to cache directory
+    """
+    return os.path.expanduser(os.environ.get(Cache.ENVIRONMENT, Cache.DIRECTORY))
+
+
+class ResultCache:
+    """On-disk cache of data-set results, keyed by source content and everything else the result
+    depends on (tool version, python version, compiler mode, folder of the file). Files around the
+    analysed one can not be hashed in the key, callers check them when reading entries.
+    Each entry is a text file, written to a temporary file first and moved in place with os.replace,
+    so processes sharing the cache never read partial entries. Modification time of an entry is
+    refreshed when read, and evict() removes least recently used entries above max_size bytes.
+    """
+    def __init__(self, directory: str = None, max_size: int = Cache.MAX_SIZE):
+        self.directory = os.path.join(directory or get_cache_dir(), Cache.RESULTS)
+        self.max_size = max_size
+
+    @staticmethod
+    def get_key(source: bytes, *options) -> str:
+        """Hash source content together with options affecting the result.
+
+        :param source: source code
+        :param options: strings which change the result for the same source
+        :return: hex digest
+        """
+        import hashlib
+        import sys
+        from src import __version__
+        digest = hashlib.sha256()
+        for option in (__version__, Cache.FORMAT, sys.version_info[:2]) + options:
+            digest.update(repr(option).encode())
+            digest.update(b'\0')
+        digest.update(source)
+        return digest.hexdigest()
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str) -> str:
+        """Get entry for key, marking it as recently used.
+
+        :param key: entry key, see get_key()
+        :return: stored value or None if not found
+        """
+        path = self.get_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                value = file.read()
+            os.utime(path)
+        except TimeoutError:
+            # Alarm of a data-set file taking too long, see src.dataset.analyse_file().
+            raise
+        except OSError:
+            return None
+        return value
+
+    def put(self, key: str, value: str):
+        """Store entry for key, replacing the existing one atomically.
+
+        :param key: entry key, see get_key()
+        :param value: text to store
+        :return:
+        """
+        path = self.get_path(key)
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                file.write(value)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            if isinstance(e, TimeoutError):
+                raise
+
+    def evict(self) -> int:
+        """Remove least recently used entries until cache size is below max_size.
+
+        :return: number of entries removed
+        """
+        entries = list()
+        total_size = 0
+        try:
+            folders = [entry.path for entry in os.scandir(self.directory) if entry.is_dir()]
+        except OSError:
+            return 0
+        for folder in folders:
+            try:
+                with os.scandir(folder) as files:
+                    for file in files:
+                        try:
+                            stat = file.stat()
+                        except OSError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, file.path))
+                        total_size += stat.st_size
+            except OSError:
+                continue
+        removed = 0
+        if total_size <= self.max_size:
+            return removed
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            removed += 1
+            total_size -= size
+            if total_size <= self.max_size:
+                break
+        return removed
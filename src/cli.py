@@ -1,5 +1,4 @@
-from src.cAST_frontend import compress
-from src.constants import Mode, Output
+from src.constants import Cache, Dataset, Logger, Mode, Output, Metadata
 from src import __version__
 
 
@@ -20,6 +19,92 @@ def cli():
         default=False,
         help="Analyse data-set by it's path.",
     )
+    parser.add_argument(
+        "--include",
+        dest='include',
+        action="append",
+        metavar="GLOB",
+        help="Only analyse data-set files matching glob, can be repeated (default: *.py)",
+    )
+    parser.add_argument(
+        "--exclude",
+        dest='exclude',
+        action="append",
+        metavar="GLOB",
+        help="Skip data-set files and folders matching glob, can be repeated",
+    )
+    parser.add_argument(
+        "--file-list",
+        dest='file_list',
+        metavar="FILE_LIST",
+        help="Analyse files listed in FILE_LIST, one path per line, '-' to read them from stdin",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest='jobs',
+        default=1,
+        type=int,
+        help="Worker processes analysing the data-set, 0 for one per core (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--timeout",
+        dest='timeout',
+        default=None,
+        type=float,
+        help="Seconds allowed to analyse each file of the data-set (default: no limit)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest='cache',
+        action="store_false",
+        help="Analyse every data-set file again instead of reusing cached results",
+    )
+    parser.add_argument(
+        "--cache-size",
+        dest='cache_size',
+        default=Cache.MAX_SIZE // (1024 * 1024),
+        type=int,
+        help="Maximum size in MB of the data-set result cache (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--dedup",
+        dest='dedup',
+        help="Skip data-set files duplicating one analysed before, byte for byte or but for blank lines, "
+             "trailing whitespace and comment lines",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--metrics",
+        dest='metrics_file',
+        metavar="METRICS_FILE",
+        help="Write running data-set statistics to this file, as CSV rows if ending in .csv and as JSON otherwise",
+    )
+    parser.add_argument(
+        "--metrics-every",
+        dest='metrics_every',
+        default=Dataset.METRICS_EVERY,
+        type=int,
+        help="Files analysed between two writes of data-set metrics (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--plot",
+        dest='plot_file',
+        metavar="PLOT_FILE",
+        help="Plot nodes and entities found along the data-set into this image file. Needs matplotlib",
+    )
+    parser.add_argument(
+        "--serve",
+        dest='serve',
+        help="Serve JSON Lines compression requests on stdin/stdout, or on --socket, using -j/--jobs processes",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--socket",
+        dest='socket',
+        metavar="SOCKET_PATH",
+        help="Unix socket path to serve on with --serve (default: stdin/stdout)",
+    )
     parser.add_argument(
         "-f",
         "--file",
@@ -48,7 +133,48 @@ def cli():
         "--output-file",
         dest='output_file',
         default=Output.Location.SYSTEM_OUT,
-        help="Write in output file (example: ~/path/to/file) (default: %(default)s)",
+        help="Write in output file (example: ~/path/to/file) (default: %(default)s). "
+             "Data-sets are written as JSON Lines, compressed if ending in .gz or .zst, or as a corpus with -O corpus",
+    )
+    parser.add_argument(
+        "--vocabulary",
+        dest='vocabulary',
+        metavar="VOCABULARY_FILE",
+        help="Write vocabulary of node names and attribute keys used by npz output as JSON",
+    )
+    parser.add_argument(
+        "--groups",
+        dest='groups',
+        metavar="GROUPS_FILE",
+        help="JSON object mapping ast.AST class names to the name their nodes get in the cAST, "
+             "replacing the default groups (Import/ImportFrom, For/While, Name/NameConstant)",
+    )
+    parser.add_argument(
+        "--chunks",
+        dest='chunks',
+        help="Output one cAST per function and class, then one for the rest of the file, as JSON Lines "
+             "or corpus records",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--compact",
+        dest='compact',
+        help="Write JSON output without whitespace between items.",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--metadata",
+        dest='metadata',
+        default=Metadata.FULL,
+        choices=Metadata.get_attr(),
+        help="Metadata kept in cAST nodes (choices: %(choices)s) (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--share-subtrees",
+        dest='share_subtrees',
+        help="Hold equal subtrees of the cAST once in memory, with --metadata none or -D/--file-list. "
+             "Builds are slower",
+        action="store_true"
     )
     parser.add_argument(
         "-v",
@@ -62,11 +188,90 @@ def cli():
         help="Output comparison analysis between original AST and custom AST.",
         action="store_true"
     )
+    parser.add_argument(
+        "--log-level",
+        dest='log_level',
+        default=Logger.LEVEL,
+        choices=Logger.LEVELS,
+        help="Minimum level of logged records, DEBUG ones only going to the log file "
+             "(choices: %(choices)s) (default: %(default)s)",
+    )
     args = parser.parse_args()
+    if args.jobs < 0:
+        parser.error("-j/--jobs must be 0, for one per core, or a positive number of workers.")
+    if args.metrics_every < 1:
+        parser.error("--metrics-every must be a positive number of files.")
+    if args.plot_file:
+        from importlib.util import find_spec
+        if find_spec('matplotlib') is None:
+            parser.error("matplotlib package is needed to plot '{}'.".format(args.plot_file))
     if args.output_type == Output.Format.PICKLE and args.output_file is Output.Location.SYSTEM_OUT:
         parser.error("Chosen PICKLE output but no -o/--output-file specified.")
-    if args.output_type == Output.Format.PICKLE and args.report:
-        parser.error("PICKLE and report combination not available. Please, choose JSON format to extract report.")
+    if args.output_type == Output.Format.NPZ and args.output_file is Output.Location.SYSTEM_OUT:
+        parser.error("Chosen NPZ output but no -o/--output-file specified.")
+    if args.output_type == Output.Format.CORPUS and args.output_file is Output.Location.SYSTEM_OUT:
+        parser.error("Chosen CORPUS output but no -o/--output-file specified.")
+    if (args.dataset or args.file_list) and args.output_type not in (Output.Format.JSON, Output.Format.CORPUS):
+        parser.error("Data-sets are only written as JSON Lines or CORPUS output.")
+    if args.chunks and args.output_type not in (Output.Format.JSON, Output.Format.CORPUS):
+        parser.error("--chunks is only available with JSON or CORPUS output.")
+    if args.chunks and args.with_report:
+        parser.error("--chunks is not available with --with-report.")
+    if args.share_subtrees and not (args.dataset or args.file_list) and (args.metadata != Metadata.NONE or args.chunks):
+        parser.error("--share-subtrees is only available with --metadata none and without --chunks.")
+    from src.logger import setup_logging
+    setup_logging(args.log_level)
+    if args.groups:
+        import json
+        from src.cAST import Groups
+        with open(args.groups) as file:
+            try:
+                Groups.configure(json.load(file))
+            except ValueError as e:
+                parser.error("Invalid groups in '{}': {}".format(args.groups, e))
+    if args.vocabulary:
+        from src.encoding import get_vocabulary
+        get_vocabulary().save(args.vocabulary)
+    if args.serve:
+        from src.server import serve
+        serve(socket_path=args.socket, jobs=args.jobs)
+        return
+    if args.dataset or args.file_list:
+        from src.cache import ResultCache
+        from src.dataset import analyse_dataset
+        cache = ResultCache(max_size=args.cache_size * 1024 * 1024) if args.cache else None
+        analyse_dataset(
+            args.dataset or None,
+            jobs=args.jobs,
+            timeout=args.timeout,
+            include=args.include,
+            exclude=args.exclude,
+            file_list=args.file_list,
+            cache=cache,
+            output_file=None if args.output_file is Output.Location.SYSTEM_OUT else args.output_file,
+            output_type=args.output_type,
+            metrics_file=args.metrics_file,
+            metrics_every=args.metrics_every,
+            plot_file=args.plot_file,
+            dedup=args.dedup,
+            share_subtrees=args.share_subtrees
+        )
+        return
+    if args.file is None:
+        parser.error("Either -f/--file, -D/--dataset or --file-list must be specified.")
+    if args.chunks:
+        from src.cAST_frontend import compress_chunks
+        compress_chunks(
+            file=args.file.read(),
+            filename=args.file.name,
+            mode=args.mode,
+            output_type=args.output_type,
+            output_file=args.output_file,
+            metadata=args.metadata,
+            compact=args.compact
+        )
+        return
+    from src.cAST_frontend import compress
     compress(
         file=args.file.read(),
         filename=args.file.name,
@@ -74,5 +279,8 @@ def cli():
         output_type=args.output_type,
         output_file=args.output_file,
         report=args.with_report,
-        dataset_path=args.dataset
+        dataset_path=args.dataset,
+        metadata=args.metadata,
+        compact=args.compact,
+        share_subtrees=args.share_subtrees
     )
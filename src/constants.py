@@ -1,13 +1,19 @@
 class Output:
     """Type of outputted AST representation enabled"""
+    SEPARATORS = (', ', ': ')
+    COMPACT_SEPARATORS = (',', ':')
+    BUFFER_SIZE = 1024 * 1024
+
     class Format:
         JSON = "json"
         PICKLE = "pickle"
+        NPZ = "npz"
+        CORPUS = "corpus"
 
         @staticmethod
         def get_attr() -> list:
             """Getter of Output class attributes"""
-            return [Output.Format.JSON, Output.Format.PICKLE]
+            return [Output.Format.JSON, Output.Format.PICKLE, Output.Format.NPZ, Output.Format.CORPUS]
 
     class Location:
         SYSTEM_OUT = "system_out"
@@ -37,9 +43,90 @@ class Mode:
         return [Mode.EXEC, Mode.EVAL, Mode.SINGLE]
 
 
+class Scope:
+    """Kinds of scope of the symbol table, see src.symbols.SymbolTable.
+    Names bound in a class scope are not visible from the scopes nested in it.
+    """
+    MODULE = "module"
+    CLASS = "class"
+    FUNCTION = "function"
+
+
+class Metadata:
+    """Metadata stored in each cAST node, being the formatted representation of it's ast.AST node:
+        'full':      each node formats it's whole subtree
+        'shared':    each node is formatted once, bottom-up, and reused by it's parent
+        'none':      metadata is not stored
+    """
+    FULL = "full"
+    SHARED = "shared"
+    NONE = "none"
+
+    @staticmethod
+    def get_attr() -> list:
+        """Getter of Metadata class attributes"""
+        return [Metadata.FULL, Metadata.SHARED, Metadata.NONE]
+
+
+class Dataset:
+    """Data-set analysis related constants"""
+    INCLUDE = ["*.py"]
+    CHUNKSIZE = 64
+    PENDING_PER_JOB = 2
+    BUFFER_SIZE = 1024 * 1024
+    METRICS_EVERY = 1000
+    DIGEST_SIZE = 16
+    METRICS_FIELDS = ["files", "ast_nodes", "cast_nodes", "ast_entities", "cast_entities", "compression_ratio",
+                      "duplicate_files", "shared_nodes", "elapsed"]
+
+
+class Chunks:
+    """Function-level chunking related constants"""
+    MODULE = "<module>"
+    SEPARATOR = "::"
+
+
+class Server:
+    """Server mode related constants"""
+    FILENAME = "<unknown>"
+    PENDING = 16
+    PENDING_PER_JOB = 4
+
+
+class Encoding:
+    """Integer encoded cAST related constants"""
+    UNKNOWN = "<unk>"
+    VALUE = "value"
+    ATTRIBUTE_KEYS = ["origin", "name", "id", "ctx", "arg", "attr", VALUE]
+    NO_PARENT = -1
+
+
+class Corpus:
+    """Binary corpus of encoded cASTs related constants"""
+    MAGIC = b"cASTcrp2"
+    ALIGNMENT = 8
+    INDEX_SUFFIX = ".index"
+    RECORDS_SUFFIX = ".records"
+    NO_FOOTER = -1
+    BUFFER_SIZE = 1024 * 1024
+
+
 class Logger:
     """Logger used constants"""
     NAME = "cAST.log"
+    ROOT = "cAST"
+    LEVEL = "INFO"
+    LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+
+
+class Cache:
+    """Persistent cache related constants"""
+    DIRECTORY = "~/.cache/cAST"
+    ENVIRONMENT = "CAST_CACHE_DIR"
+    STDLIB = "stdlib-{tag}-{version}.json"
+    RESULTS = "results"
+    FORMAT = 5
+    MAX_SIZE = 1024 * 1024 * 1024
 
 
 class Origin:
@@ -50,11 +137,11 @@ class Origin:
     UNKNOWN = 'UNK'
 
     class Buildin_Functions:
-        """List of in-build functions by python3.8.1"""
-        INBUILD = ['abs', 'all', 'any', 'ascii', 'bin', 'bool', 'breakpoint', 'bytearray', 'bytes', 'callable', 'chr',
+        """Set of in-build functions by python3.8.1"""
+        INBUILD = frozenset(['abs', 'all', 'any', 'ascii', 'bin', 'bool', 'breakpoint', 'bytearray', 'bytes', 'callable', 'chr',
                    'classmethod', 'compile', 'complex', 'delattr', 'dict', 'dir', 'divmod', 'enumerate', 'eval', 'exec',
                    'filter', 'float', 'format', 'frozenset', 'getattr', 'globals', 'hasattr', 'hash', 'help', 'hex', 'id',
                    'input', 'int', 'isinstance', 'issubclass', 'iter', 'len', 'list', 'locals', 'map', 'max', 'memoryview',
                    'min', 'next', 'object', 'oct', 'open', 'ord', 'pow', 'print', 'property', 'range', 'repr', 'reversed',
                    'round', 'set', 'setattr', 'slice', 'sorted', 'staticmethod', 'str', 'sum', 'super', 'tuple', 'type',
-                   'vars', 'zip', '__import__']
\ No newline at end of file
+                   'vars', 'zip', '__import__'])
\ No newline at end of file
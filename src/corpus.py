@@ -0,0 +1,245 @@
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from src.constants import Corpus
+
+# Arrays of a record, in storage order, and their array/memoryview type codes.
+FIELDS = (
+    ('types', 'H'),
+    ('parents', 'i'),
+    ('attribute_nodes', 'i'),
+    ('attribute_items', 'i'),
+    ('attribute_keys', 'H'),
+    ('attribute_values', 'i'),
+    ('attribute_json', 'B'),
+    ('string_offsets', 'q'),
+    ('string_data', 'B'),
+    ('name', 'B'),
+)
+# Corpus files are little-endian: headers, footers, index and arrays alike.
+HEADER = struct.Struct('<{}q'.format(len(FIELDS)))
+FOOTER = struct.Struct('<qqq8s')
+OFFSET = struct.Struct('<q')
+SWAP = sys.byteorder != 'little'
+
+
+def _padding(size: int) -> bytes:
+    return b'\0' * (-size % Corpus.ALIGNMENT)
+
+
+def _little_endian(values: array) -> array:
+    if SWAP and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def pack_record(encoded: dict, name: str = '') -> bytes:
+    """Pack an encoded cAST in the corpus record layout: a header with the length of each array,
+    followed by the arrays, each one padded to Corpus.ALIGNMENT bytes.
+
+    :param encoded: dict of arrays as given by src.encoding.encode()
+    :param name: name of the tree, for instance path of it's source file
+    :return: bytes
+    """
+    arrays = list()
+    for field, type_code in FIELDS:
+        values = name.encode('utf-8') if field == 'name' else encoded.get(field)
+        arrays.append(values if isinstance(values, array) and values.typecode == type_code
+                      else array(type_code, values))
+    chunks = [HEADER.pack(*(len(values) for values in arrays))]
+    for values in arrays:
+        data = _little_endian(values).tobytes()
+        chunks.append(data)
+        chunks.append(_padding(len(data)))
+    return b''.join(chunks)
+
+
+class CorpusWriter:
+    """Append encoded cASTs to a corpus file.
+    Layout: Corpus.MAGIC, then for each writer that appended to it: records (see pack_record()), index of
+    the offsets of these records and a footer with index offset, number of records, offset of the previous
+    footer (Corpus.NO_FOOTER for the first one) and Corpus.MAGIC.
+    Offsets are kept in a side file while writing, so memory does not grow with the number of records.
+    When appending to an existing corpus, records are also kept in a side file: the corpus is left untouched
+    until close() adds them after it's last footer, so a failed run does not lose earlier records. Side files
+    are unique to each writer and the corpus is locked while closing, so writers may append concurrently.
+    """
+    def __init__(self, file_name: str, append: bool = False):
+        self.file_name = file_name
+        self.count = 0
+        if append and os.path.exists(file_name):
+            with open(file_name, 'rb') as file:
+                read_footer(file)
+            self.file = None
+            self.records = self._side_file(Corpus.RECORDS_SUFFIX)
+        else:
+            self.file = open(file_name, 'wb', buffering=Corpus.BUFFER_SIZE)
+            self.file.write(Corpus.MAGIC)
+            self.records = self.file
+        self.start = self.records.tell()
+        self.index = self._side_file(Corpus.INDEX_SUFFIX)
+
+    def _side_file(self, suffix: str):
+        directory, name = os.path.split(os.path.abspath(self.file_name))
+        handle, path = tempfile.mkstemp(suffix=suffix, prefix=name + '.', dir=directory)
+        os.close(handle)
+        return open(path, 'w+b', buffering=Corpus.BUFFER_SIZE)
+
+    def write(self, record: bytes):
+        """Append a record packed by pack_record().
+
+        :param record: bytes
+        :return:
+        """
+        self.index.write(OFFSET.pack(self.records.tell() - self.start))
+        self.records.write(record)
+        self.count += 1
+
+    def append(self, encoded: dict, name: str = ''):
+        self.write(pack_record(encoded, name))
+
+    def close(self):
+        if self.file is None:
+            self.file = open(self.file_name, 'r+b', buffering=Corpus.BUFFER_SIZE)
+        try:
+            self._lock()
+            previous = Corpus.NO_FOOTER
+            base = self.start
+            if self.records is not self.file:
+                # Read under the lock: other writers may have appended since this one was opened.
+                read_footer(self.file)
+                previous = self.file.tell() - FOOTER.size
+                base = self.file.tell()
+                self._copy(self.records, bytes)
+            index_offset = self.file.tell()
+            self._copy(self.index, lambda data: b''.join(
+                OFFSET.pack(base + offset) for offset, in OFFSET.iter_unpack(data)))
+            # The previous footer stays the last one until records and index are on disk.
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.write(FOOTER.pack(index_offset, self.count, previous, Corpus.MAGIC))
+        finally:
+            self.file.close()
+            for side in (self.records, self.index):
+                if side is not self.file:
+                    side.close()
+                    os.remove(side.name)
+
+    def _lock(self):
+        try:
+            import fcntl
+        except ImportError:
+            return
+        # Released when the file is closed.
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+
+    def _copy(self, side, convert):
+        side.flush()
+        side.seek(0)
+        while True:
+            data = side.read(Corpus.BUFFER_SIZE)
+            if not data:
+                break
+            self.file.write(convert(data))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_footer(file) -> tuple:
+    """Read the last footer of an open corpus file.
+
+    :param file: corpus file opened in binary mode, left at it's end
+    :return: index offset, number of records indexed and offset of the previous footer
+    """
+    file.seek(-FOOTER.size, os.SEEK_END)
+    index_offset, count, previous, magic = FOOTER.unpack(file.read(FOOTER.size))
+    if magic != Corpus.MAGIC:
+        raise ValueError("'{}' is not a cAST corpus".format(file.name))
+    return index_offset, count, previous
+
+
+class CorpusReader:
+    """Random access to the records of a corpus file through mmap.
+    Getting tree i only reads it's header and slices it's arrays out of the mapping: other trees are
+    neither read nor deserialized, and arrays are zero-copy memoryviews (or numpy views with as_numpy).
+    """
+    def __init__(self, file_name: str):
+        import mmap
+        with open(file_name, 'rb') as file:
+            index_offset, count, previous = read_footer(file)
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.mmap)
+        indexes = [self.buffer[index_offset:index_offset + count * OFFSET.size]]
+        while previous != Corpus.NO_FOOTER:
+            index_offset, count, previous, _ = FOOTER.unpack_from(self.buffer, previous)
+            indexes.append(self.buffer[index_offset:index_offset + count * OFFSET.size])
+        self.offsets = array('q')
+        for index in reversed(indexes):
+            self.offsets.frombytes(index)
+            index.release()
+        self.offsets = _little_endian(self.offsets)
+        self.count = len(self.offsets)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, position: int) -> dict:
+        return self.get(position)
+
+    def __iter__(self):
+        for position in range(self.count):
+            yield self.get(position)
+
+    def get(self, position: int, as_numpy: bool = False) -> dict:
+        """Get encoded tree at position, as src.encoding.decode() accepts it, plus it's 'name'.
+        On big-endian machines arrays are copied to native byte order, unless as_numpy.
+
+        :param position: number of the tree in the corpus
+        :param as_numpy: get numpy arrays instead of memoryviews. Needs numpy
+        :return: dict of arrays
+        """
+        if position < 0:
+            position += self.count
+        if not 0 <= position < self.count:
+            raise IndexError("corpus record out of range")
+        offset = self.offsets[position]
+        lengths = HEADER.unpack_from(self.buffer, offset)
+        offset += HEADER.size
+        encoded = dict()
+        for (field, type_code), length in zip(FIELDS, lengths):
+            size = length * array(type_code).itemsize
+            values = self.buffer[offset:offset + size]
+            if as_numpy:
+                import numpy
+                values = numpy.frombuffer(values, dtype=numpy.dtype(type_code).newbyteorder('<'))
+            elif SWAP:
+                values = _little_endian(array(type_code, values.tobytes()))
+            else:
+                values = values.cast(type_code)
+            encoded[field] = values
+            offset += size + len(_padding(size))
+        return encoded
+
+    def get_name(self, position: int) -> str:
+        return bytes(self.get(position).get('name')).decode('utf-8')
+
+    def close(self):
+        self.buffer.release()
+        try:
+            self.mmap.close()
+        except BufferError:
+            # Records got from this reader are still alive: the mapping goes once they are garbage collected.
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,538 @@
+import logging
+import os
+from src.cAST_frontend import build
+from src.constants import Dataset, Metadata, Mode, Output
+from src.eval import Statistics, analyse
+from src.cAST import Groups
+from src.logger import get_logger, start_forwarding
+
+logger = get_logger('dataset')
+
+
+def _matches(path: str, name: str, patterns) -> bool:
+    from fnmatch import fnmatch
+    return any(fnmatch(path, pattern) or fnmatch(name, pattern) for pattern in patterns)
+
+
+def discover_files(path_dataset: str = None, include=None, exclude=None, file_list: str = None):
+    """Lazily find files of a data-set.
+    Folders are walked recursively with os.scandir, without listing the whole data-set first.
+    Globs are matched against the path relative to path_dataset and against the file name.
+    Folders matching an exclude glob are not walked.
+
+    :param path_dataset: path to data-set folder. None to only use file_list
+    :param include: globs files must match (default: Dataset.INCLUDE)
+    :param exclude: globs files must not match
+    :param file_list: path to a file listing one path per line, '-' for stdin. None to not use it
+    :return: generator of paths to files
+    """
+    import sys
+    include = include or Dataset.INCLUDE
+    exclude = exclude or list()
+    if file_list:
+        file = sys.stdin if file_list == '-' else open(file_list, 'r')
+        try:
+            for line in file:
+                file_path = line.strip()
+                if not file_path:
+                    continue
+                name = os.path.basename(file_path)
+                if _matches(file_path, name, include) and not _matches(file_path, name, exclude):
+                    yield file_path
+        finally:
+            if file is not sys.stdin:
+                file.close()
+    if path_dataset is None:
+        return
+    folders = [path_dataset]
+    while folders:
+        folder = folders.pop()
+        try:
+            entries = os.scandir(folder)
+        except OSError as e:
+            logger.warning("Could not list '{}': {}".format(folder, e))
+            continue
+        with entries:
+            for entry in entries:
+                relative_path = os.path.relpath(entry.path, path_dataset)
+                if _matches(relative_path, entry.name, exclude):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append(entry.path)
+                elif entry.is_file() and _matches(relative_path, entry.name, include):
+                    yield entry.path
+
+
+def fingerprint(source: bytes) -> tuple:
+    """Fingerprints of a source file: digest of it's bytes, and digest of it's lines once line endings,
+    trailing whitespace, blank lines and full-line comments are dropped.
+
+    :param source: content of the file
+    :return: exact digest, normalized digest
+    """
+    import hashlib
+    lines = list()
+    for line in source.splitlines():
+        line = line.rstrip()
+        if line and not line.lstrip().startswith(b'#'):
+            lines.append(line)
+    exact = hashlib.blake2b(source, digest_size=Dataset.DIGEST_SIZE).digest()
+    return exact, hashlib.blake2b(b'\n'.join(lines), digest_size=Dataset.DIGEST_SIZE).digest()
+
+
+def fingerprint_chunk(file_paths: list) -> list:
+    """Fingerprint a chunk of files in a worker process, see fingerprint().
+
+    :param file_paths: paths to files
+    :return: list of (file_path, exact digest, normalized digest) tuples, digests being None for unreadable files
+    """
+    fingerprints = list()
+    for file_path in file_paths:
+        try:
+            with open(file_path, 'rb') as file:
+                fingerprints.append((file_path,) + fingerprint(file.read()))
+        except OSError:
+            fingerprints.append((file_path, None, None))
+    return fingerprints
+
+
+class DedupIndex:
+    """Fingerprints of the data-set files kept for analysis, so files duplicating one of them are skipped
+    before being parsed. Exact duplicates have the same bytes, near duplicates only differ in line endings,
+    trailing whitespace, blank lines or full-line comments. See fingerprint().
+    """
+    def __init__(self):
+        self.exact = set()
+        self.normalized = set()
+        self.duplicates = {'exact': 0, 'near': 0}
+
+    def is_duplicate(self, exact: bytes, normalized: bytes) -> bool:
+        """Check if a file was already seen, adding it to the index otherwise.
+
+        :param exact: exact digest of the file, None when unknown
+        :param normalized: normalized digest of the file, None when unknown
+        :return: bool
+        """
+        if exact is None:
+            return False
+        if exact in self.exact:
+            self.duplicates['exact'] += 1
+            return True
+        if normalized in self.normalized:
+            self.duplicates['near'] += 1
+            return True
+        self.exact.add(exact)
+        self.normalized.add(normalized)
+        return False
+
+    def filter(self, fingerprints: list) -> list:
+        """Get paths of the files not seen yet, see fingerprint_chunk().
+
+        :param fingerprints: list of (file_path, exact digest, normalized digest) tuples
+        :return: list of paths
+        """
+        return [file_path for file_path, exact, normalized in fingerprints
+                if not self.is_duplicate(exact, normalized)]
+
+
+def _raise_timeout(signum, frame):
+    raise TimeoutError("analysis took longer than allowed")
+
+
+def to_record(file_path: str, cast_json: str, report_json: str) -> str:
+    """JSON Lines record of an analysed file, from the JSON documents of it's cAST and report."""
+    import json
+    return '{"path": ' + json.dumps(file_path) + ', "cast": ' + cast_json + ', "report": ' + report_json + '}\n'
+
+
+def to_corpus_record(file_path: str, c_ast) -> bytes:
+    """Corpus record of an analysed file, see src.corpus.pack_record().
+
+    :param file_path: path to file, used as name of the record
+    :param c_ast: cAST of the file or the Node.to_dict() representation of it's root
+    :return: bytes
+    """
+    from src.corpus import pack_record
+    from src.encoding import encode
+    return pack_record(encode(c_ast), file_path)
+
+
+def analyse_file(file_path: str, timeout: float = None, cache=None, with_record: bool = False,
+                 record_format: str = Output.Format.JSON, share_subtrees: bool = False) -> tuple:
+    """Compress a data-set file and get it's report.
+    Files failing to be analysed, or taking longer than timeout seconds, are skipped.
+    When a cache is given, files already analysed with the same content are not analysed again.
+    Cache entries hold the report, the user modules the file imports (see
+    src.origin.OriginResolver.resolve_user_modules()) and cAST JSON documents in three lines. Entries whose
+    user modules were added or removed next to the file since they were stored are analysed again.
+    Records are serialized here, so worker processes and not the writer pay for it.
+
+    :param file_path: path to file
+    :param timeout: seconds allowed for the file, enforced with SIGALRM in the main thread only. None for no limit
+    :param cache: ResultCache or None to not use it
+    :param with_record: also get the record of the file
+    :param record_format: Output.Format.JSON for a JSON Lines record, see to_record(), or Output.Format.CORPUS
+                          for a corpus record, see to_corpus_record()
+    :param share_subtrees: hold equal subtrees once, see src.cAST_frontend.build()
+    :return: report of the file and it's record, None for each one not available
+    """
+    import json
+    import signal
+    import threading
+    from src.origin import get_resolver
+    use_alarm = False
+    try:
+        if timeout and hasattr(signal, 'SIGALRM') and threading.current_thread() is threading.main_thread():
+            previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+            use_alarm = True
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        with open(file_path, 'rb') as file:
+            source = file.read()
+        directory = os.path.dirname(os.path.abspath(file_path))
+        if cache is not None:
+            options = (Mode.EXEC, directory)
+            if Groups.get_groups() != Groups.DEFAULT:
+                options += (sorted(Groups.get_groups().items()),)
+            if share_subtrees:
+                options += ('share_subtrees',)
+            key = cache.get_key(source, *options)
+            entry = cache.get(key)
+            if entry is not None:
+                report_json, user_json, cast_json = entry.split('\n', 2)
+                if not get_resolver().check_user_modules(json.loads(user_json), directory):
+                    entry = None
+            if entry is not None:
+                if not with_record:
+                    return json.loads(report_json), None
+                if record_format == Output.Format.CORPUS:
+                    return json.loads(report_json), to_corpus_record(file_path, json.loads(cast_json))
+                return json.loads(report_json), to_record(file_path, cast_json, report_json)
+        tree, c_ast = build(source, file_path, Mode.EXEC, Metadata.NONE, share_subtrees=share_subtrees)
+        report = analyse(tree, c_ast)
+        if cache is None and (not with_record or record_format == Output.Format.CORPUS):
+            return report, to_corpus_record(file_path, c_ast) if with_record else None
+        cast_json = "".join(c_ast.root.iter_json())
+        report_json = json.dumps(report)
+        if cache is not None:
+            user_json = json.dumps(get_resolver().resolve_user_modules(tree, directory))
+            cache.put(key, report_json + '\n' + user_json + '\n' + cast_json)
+        if not with_record:
+            return report, None
+        if record_format == Output.Format.CORPUS:
+            return report, to_corpus_record(file_path, c_ast)
+        return report, to_record(file_path, cast_json, report_json)
+    except TimeoutError:
+        logger.warning("Skipped '{}': analysis exceeded {} seconds".format(file_path, timeout))
+    except Exception as e:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Skipped '{}': {}".format(file_path, e))
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    return None, None
+
+
+def analyse_chunk(file_paths: list, timeout: float = None, cache=None, with_record: bool = False,
+                  record_format: str = Output.Format.JSON, share_subtrees: bool = False) -> list:
+    """Analyse a chunk of files in a worker process.
+
+    :param file_paths: paths to files
+    :param timeout: seconds allowed per file. None for no limit
+    :param cache: ResultCache or None to not use it
+    :param with_record: also get records of files
+    :param record_format: format of records, see analyse_file()
+    :param share_subtrees: hold equal subtrees once, see analyse_file()
+    :return: list of (file_path, report, record) tuples
+    """
+    return [(file_path,) + analyse_file(file_path, timeout, cache, with_record, record_format, share_subtrees)
+            for file_path in file_paths]
+
+
+def init_worker(worker_queue, level: int, groups: dict):
+    """Initializer of data-set worker processes: forward their logs, see src.logger.init_worker(), and
+    name nodes with the groups of the parent process.
+    """
+    from src.logger import init_worker as init_worker_logging
+    init_worker_logging(worker_queue, level)
+    Groups.configure(groups)
+
+
+def chunks(iterable, size: int):
+    """Group items of iterable in lists of size items, the last one may be shorter."""
+    chunk = list()
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = list()
+    if chunk:
+        yield chunk
+
+
+def iter_results(file_paths, jobs: int = 1, timeout: float = None, cache=None, with_record: bool = False,
+                 chunksize: int = Dataset.CHUNKSIZE, record_format: str = Output.Format.JSON, dedup=None,
+                 share_subtrees: bool = False):
+    """Analyse files, spreading them over a pool of jobs processes when jobs > 1.
+    Files are submitted in chunks and only a bounded number of chunks is pending at a time.
+    Results are yielded as they complete, so their order is not the one of file_paths.
+    Log records of workers are forwarded to this process, see src.logger.start_forwarding().
+    With a dedup index, chunks are first fingerprinted by workers and only files not duplicating a
+    previous one are then analysed. Duplicates are not yielded, they are counted by the index.
+
+    :param file_paths: iterable of paths to files
+    :param jobs: number of worker processes. 0 uses every available core
+    :param timeout: seconds allowed per file. None for no limit
+    :param cache: ResultCache shared by workers or None to not use it
+    :param with_record: also get records of files
+    :param chunksize: files sent to a worker at once
+    :param record_format: format of records, see analyse_file()
+    :param dedup: DedupIndex or None to analyse every file
+    :param share_subtrees: hold equal subtrees once, see analyse_file()
+    :return: generator of (file_path, report, record) tuples, report being None for skipped files
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if jobs == 1:
+        for file_path in file_paths:
+            if dedup is not None and not dedup.filter(fingerprint_chunk([file_path])):
+                continue
+            yield (file_path,) + analyse_file(file_path, timeout, cache, with_record, record_format,
+                                              share_subtrees)
+        return
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    worker_queue, listener = start_forwarding()
+    level = logger.getEffectiveLevel()
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                 initargs=(worker_queue, level, Groups.get_groups())) as executor:
+            pending = set()
+            fingerprinting = set()
+
+            def complete(done):
+                for future in done:
+                    if future not in fingerprinting:
+                        yield from future.result()
+                        continue
+                    fingerprinting.discard(future)
+                    unique = dedup.filter(future.result())
+                    if unique:
+                        pending.add(executor.submit(analyse_chunk, unique, timeout, cache, with_record,
+                                                    record_format, share_subtrees))
+
+            for chunk in chunks(file_paths, chunksize):
+                if dedup is None:
+                    pending.add(executor.submit(analyse_chunk, chunk, timeout, cache, with_record, record_format,
+                                                share_subtrees))
+                else:
+                    future = executor.submit(fingerprint_chunk, chunk)
+                    fingerprinting.add(future)
+                    pending.add(future)
+                if len(pending) >= jobs * Dataset.PENDING_PER_JOB:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from complete(done)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from complete(done)
+    finally:
+        listener.stop()
+        worker_queue.close()
+
+
+def analyse_dataset(path_dataset: str, jobs: int = 1, timeout: float = None, include=None, exclude=None,
+                    file_list: str = None, cache=None, output_file: str = None,
+                    output_type: str = Output.Format.JSON, metrics_file: str = None,
+                    metrics_every: int = Dataset.METRICS_EVERY, plot_file: str = None, dedup: bool = False,
+                    share_subtrees: bool = False):
+    """Analyse every python file of a data-set and report the nodes and entities found.
+    When output_file is given, the cAST and report of each file are streamed to it as JSON Lines,
+    or the encoded cAST of each file is appended to it as a corpus record with Output.Format.CORPUS.
+
+    :param path_dataset: path to data-set folder. None to only use file_list
+    :param jobs: number of worker processes. 0 uses every available core
+    :param timeout: seconds allowed per file. None for no limit
+    :param include: globs files must match (default: Dataset.INCLUDE)
+    :param exclude: globs files must not match
+    :param file_list: path to a file listing one path per line, '-' for stdin. None to not use it
+    :param cache: ResultCache or None to not use it. Least recently used entries are evicted at the end
+    :param output_file: path to output, JSON Lines being compressed when ending in .gz or .zst. None for no output
+    :param output_type: Output.Format.JSON or Output.Format.CORPUS
+    :param metrics_file: path to metrics written every metrics_every files and at the end, see Metrics.
+                         None to not write them
+    :param metrics_every: files analysed between two writes of metrics
+    :param plot_file: path to image plotting the evolution of nodes and entities, see plot_dataset().
+                      None to not plot
+    :param dedup: skip files duplicating, exactly or nearly, one analysed before. See DedupIndex
+    :param share_subtrees: hold equal subtrees of each cAST once, their saved nodes being counted by statistics.
+                           See src.cAST_frontend.build()
+    :return: Statistics of analysed files
+    """
+    statistics = Statistics()
+    metrics = Metrics(metrics_file, metrics_every) if metrics_file else None
+    dedup_index = DedupIndex() if dedup else None
+    if plot_file:
+        dataset_ast_nodes = [0]
+        dataset_cast_nodes = [0]
+        dataset_ast_entities = [0]
+        dataset_cast_entities = [0]
+    file_paths = discover_files(path_dataset, include=include, exclude=exclude, file_list=file_list)
+    results = iter_results(file_paths, jobs=jobs, timeout=timeout, cache=cache, with_record=bool(output_file),
+                           record_format=output_type, dedup=dedup_index, share_subtrees=share_subtrees)
+    with open_records(output_file, output_type) as records:
+        for file_path, evaluation, record in results:
+            if evaluation is None:
+                continue
+            if record is not None:
+                records.write(record)
+            statistics.add(evaluation)
+            if dedup_index is not None:
+                statistics.duplicates.update(dedup_index.duplicates)
+            if metrics is not None:
+                metrics.update(statistics)
+            if plot_file:
+                eval_ast = evaluation.get('ast')
+                eval_cast = evaluation.get('cast')
+                dataset_ast_entities.append(dataset_ast_entities[-1] + eval_ast.get('total_entities'))
+                dataset_cast_entities.append(dataset_cast_entities[-1] + eval_cast.get('total_entities'))
+                dataset_ast_nodes.append(dataset_ast_nodes[-1] + eval_ast.get('total_nodes'))
+                dataset_cast_nodes.append(dataset_cast_nodes[-1] + eval_cast.get('total_nodes'))
+    if dedup_index is not None:
+        statistics.duplicates.update(dedup_index.duplicates)
+    if metrics is not None:
+        metrics.finish(statistics)
+    if plot_file:
+        plot_dataset(dataset_ast_nodes, dataset_cast_nodes, dataset_ast_entities, dataset_cast_entities, plot_file)
+    if cache is not None:
+        evicted = cache.evict()
+        logger.debug("Evicted {} entries from result cache".format(evicted))
+    logger.info("Analysed {} files: {} AST nodes, {} cAST nodes, compression ratio {:.2f}".format(
+        statistics.files, statistics.nodes.get('ast'), statistics.nodes.get('cast'),
+        statistics.get_compression_ratio()))
+    logger.info("Shared {} cAST nodes, skipped {} duplicate files ({} exact, {} near)".format(
+        statistics.shared_nodes, statistics.get_duplicate_files(), statistics.duplicates.get('exact'),
+        statistics.duplicates.get('near')))
+    return statistics
+
+
+def open_records(output_file: str, output_type: str = Output.Format.JSON):
+    """Open JSON Lines output for writing through a buffer of Dataset.BUFFER_SIZE bytes.
+    Output is gzip compressed when ending in .gz and zstd compressed, through the zstandard package,
+    when ending in .zst.
+
+    :param output_file: path to output. None to discard records
+    :param output_type: Output.Format.JSON, or Output.Format.CORPUS to get a src.corpus.CorpusWriter
+    :return: text file object
+    """
+    import io
+    if output_file is None:
+        return open(os.devnull, 'w')
+    if output_type == Output.Format.CORPUS:
+        from src.corpus import CorpusWriter
+        return CorpusWriter(output_file)
+    if output_file.endswith('.gz'):
+        import gzip
+        binary = gzip.GzipFile(output_file, 'wb')
+    elif output_file.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard package is needed to write '{}'".format(output_file))
+        binary = zstandard.ZstdCompressor().stream_writer(open(output_file, 'wb'))
+    else:
+        binary = open(output_file, 'wb', buffering=0)
+    return io.TextIOWrapper(io.BufferedWriter(binary, buffer_size=Dataset.BUFFER_SIZE), encoding='utf-8')
+
+
+class Metrics:
+    """Running aggregate of a data-set analysis written to a metrics file every few files.
+    Files ending in .csv get one row of Dataset.METRICS_FIELDS appended each time, any other file is
+    rewritten with the JSON document of the whole aggregate (see Statistics.to_dict()).
+    """
+    def __init__(self, file_name: str, every: int = Dataset.METRICS_EVERY):
+        import time
+        self.file_name = file_name
+        self.every = every
+        self.start = time.perf_counter()
+        self.written = None
+        if self.is_csv():
+            with open(file_name, 'w') as file:
+                file.write(','.join(Dataset.METRICS_FIELDS) + '\n')
+
+    def is_csv(self) -> bool:
+        return self.file_name.endswith('.csv')
+
+    def update(self, statistics: Statistics):
+        """Write metrics when the number of files analysed is a multiple of self.every.
+
+        :param statistics: Statistics of files analysed so far
+        :return:
+        """
+        if statistics.files % self.every == 0:
+            self.write(statistics)
+
+    def finish(self, statistics: Statistics):
+        """Write final metrics, unless they were just written.
+
+        :param statistics: Statistics of every file analysed
+        :return:
+        """
+        if self.written != statistics.files:
+            self.write(statistics)
+
+    def write(self, statistics: Statistics):
+        """Write metrics of statistics.
+
+        :param statistics: Statistics of files analysed so far
+        :return:
+        """
+        import json
+        import time
+        elapsed = time.perf_counter() - self.start
+        self.written = statistics.files
+        if self.is_csv():
+            row = [statistics.files, statistics.nodes.get('ast'), statistics.nodes.get('cast'),
+                   len(statistics.histograms.get('ast')), len(statistics.histograms.get('cast')),
+                   '{:.4f}'.format(statistics.get_compression_ratio()), statistics.get_duplicate_files(),
+                   statistics.shared_nodes, '{:.3f}'.format(elapsed)]
+            with open(self.file_name, 'a') as file:
+                file.write(','.join(str(value) for value in row) + '\n')
+            return
+        document = statistics.to_dict()
+        document['elapsed'] = elapsed
+        temporary = self.file_name + '.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(document, file)
+        os.replace(temporary, self.file_name)
+
+
+def plot_dataset(dataset_ast_nodes, dataset_cast_nodes, dataset_ast_entities, dataset_cast_entities, plot_file: str):
+    """Plot the evolution of nodes and entities found along a data-set into plot_file.
+    Matplotlib is imported here, with it's non-interactive Agg backend, so it is only needed to plot.
+
+    :param dataset_ast_nodes: cumulative AST nodes after each file
+    :param dataset_cast_nodes: cumulative cAST nodes after each file
+    :param dataset_ast_entities: cumulative AST entities after each file
+    :param dataset_cast_entities: cumulative cAST entities after each file
+    :param plot_file: path to image, format being chosen by it's extension
+    :return:
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    figure, (nodes, entities) = plt.subplots(1, 2, figsize=(12, 5))
+    nodes.plot(dataset_ast_nodes, label='AST')
+    nodes.plot(dataset_cast_nodes, label='custom AST')
+    nodes.legend()
+    nodes.set_ylabel("Number of nodes visited in data-set")
+    nodes.set_xlabel("Number of files analysed")
+    nodes.set_title("Nodes shown in data-set and analysed\n by DeepCode")
+    entities.plot(dataset_ast_entities, label='AST')
+    entities.plot(dataset_cast_entities, label='custom AST')
+    entities.legend()
+    entities.set_ylabel("Number of entities visited in data-set")
+    entities.set_xlabel("Total of files analysed")
+    entities.set_title("Entities shown in data-set and analysed\n by DeepCode")
+    figure.tight_layout()
+    figure.savefig(plot_file)
+    plt.close(figure)
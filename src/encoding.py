@@ -0,0 +1,209 @@
+import ast
+from array import array
+from src.cAST import Groups
+from src.constants import Encoding
+
+
+class Vocabulary:
+    """Vocabulary of cAST tokens: node names given by Groups to every concrete ast.AST class,
+    and attribute keys. Token ids follow sorted order, so a python version always builds the same
+    vocabulary. Id 0 is kept for Encoding.UNKNOWN.
+    """
+    def __init__(self, tokens: list):
+        self.tokens = list(tokens)
+        self.ids = {token: position for position, token in enumerate(self.tokens)}
+
+    @staticmethod
+    def build():
+        """Build vocabulary of running python version.
+
+        :return: Vocabulary
+        """
+        import _ast
+        classes = {value for value in vars(_ast).values() if isinstance(value, type) and issubclass(value, ast.AST)}
+        # Abstract classes (stmt, expr...) never show up in a tree.
+        bases = {base for node_class in classes for base in node_class.__bases__}
+        names = {Groups.names.get(node_class) for node_class in classes - bases}
+        if Groups.constant_names is not None:
+            names.update(Groups.constant_names.values())
+        tokens = [Encoding.UNKNOWN] + sorted(names) + sorted(set(Encoding.ATTRIBUTE_KEYS) - names)
+        return Vocabulary(tokens)
+
+    @staticmethod
+    def load(file_name: str):
+        import json
+        with open(file_name, 'r') as file:
+            return Vocabulary(json.load(file))
+
+    def save(self, file_name: str):
+        import json
+        with open(file_name, 'w') as file:
+            json.dump(self.tokens, file)
+
+    def get_id(self, token: str) -> int:
+        return self.ids.get(token, 0)
+
+    def get_token(self, token_id: int) -> str:
+        return self.tokens[token_id]
+
+    def __len__(self):
+        return len(self.tokens)
+
+
+_vocabulary = None
+
+
+def get_vocabulary() -> Vocabulary:
+    """Get the Vocabulary shared by the whole interpreter.
+
+    :return: Vocabulary
+    """
+    global _vocabulary
+    if _vocabulary is None:
+        _vocabulary = Vocabulary.build()
+    return _vocabulary
+
+
+def _get_node_body(node) -> tuple:
+    """Name, CAST_body attributes and childs of a Node or of it's Node.to_dict() representation."""
+    if isinstance(node, dict):
+        body = node.get('CAST_body')
+        childs = [item for item in body if isinstance(item, dict) and 'CAST_type' in item]
+        return node.get('CAST_type'), body[:len(body) - len(childs)], childs
+    attributes, with_childs = node.get_body_attributes()
+    return node.name, attributes, node.childs if with_childs else ()
+
+
+def encode(c_ast, vocabulary: Vocabulary = None) -> dict:
+    """Encode a cAST as flat integer arrays, nodes being in the same preorder than Node.to_dict().
+    Arrays:
+        - types: vocabulary id of each node name
+        - parents: position of the parent of each node, Encoding.NO_PARENT for the root
+        - attribute_nodes: position of the node each attribute belongs to
+        - attribute_items: position of the attribute in the CAST_body of it's node, attributes coming
+                           from the same dict share it
+        - attribute_keys: vocabulary id of each attribute key, Encoding.VALUE for items without key
+        - attribute_values: position of each attribute value in the string table
+        - attribute_json: 1 when the value is stored JSON encoded because it is not a str
+        - string_offsets, string_data: UTF-8 string table of the tree, string i being
+                                       string_data[string_offsets[i]:string_offsets[i + 1]]
+
+    :param c_ast: cAST to encode, or the Node.to_dict() representation of it's root
+    :param vocabulary: Vocabulary, the shared one by default
+    :return: dict of array.array
+    """
+    import json
+    vocabulary = vocabulary or get_vocabulary()
+    value_id = vocabulary.get_id(Encoding.VALUE)
+    encoded = {
+        'types': array('i'),
+        'parents': array('i'),
+        'attribute_nodes': array('i'),
+        'attribute_items': array('i'),
+        'attribute_keys': array('i'),
+        'attribute_values': array('i'),
+        'attribute_json': array('B'),
+        'string_offsets': array('q', [0]),
+    }
+    string_data = bytearray()
+    strings = dict()
+
+    def add_attribute(position, item, key_id, value):
+        is_json = not isinstance(value, str)
+        text = json.dumps(value) if is_json else value
+        if text not in strings:
+            strings[text] = len(strings)
+            string_data.extend(text.encode('utf-8'))
+            encoded.get('string_offsets').append(len(string_data))
+        encoded.get('attribute_nodes').append(position)
+        encoded.get('attribute_items').append(item)
+        encoded.get('attribute_keys').append(key_id)
+        encoded.get('attribute_values').append(strings.get(text))
+        encoded.get('attribute_json').append(is_json)
+
+    stack = [(c_ast if isinstance(c_ast, dict) else c_ast.root, Encoding.NO_PARENT)]
+    while stack:
+        node, parent = stack.pop()
+        position = len(encoded.get('types'))
+        name, attributes, childs = _get_node_body(node)
+        encoded.get('types').append(vocabulary.get_id(name))
+        encoded.get('parents').append(parent)
+        for item, attribute in enumerate(attributes):
+            if isinstance(attribute, dict):
+                for key, value in attribute.items():
+                    add_attribute(position, item, vocabulary.get_id(key), value)
+            else:
+                add_attribute(position, item, value_id, attribute)
+        stack.extend((child, position) for child in reversed(childs))
+    encoded['string_data'] = array('B', string_data)
+    return encoded
+
+
+def decode(encoded: dict, vocabulary: Vocabulary = None) -> dict:
+    """Rebuild the Node.to_dict() representation of an encoded cAST.
+
+    :param encoded: dict of arrays as given by encode() or load_npz()
+    :param vocabulary: Vocabulary used to encode, the shared one by default
+    :return: dict
+    """
+    import json
+    vocabulary = vocabulary or get_vocabulary()
+    value_id = vocabulary.get_id(Encoding.VALUE)
+    offsets = encoded.get('string_offsets').tolist()
+    data = bytes(encoded.get('string_data'))
+    nodes = list()
+    for type_id, parent in zip(encoded.get('types').tolist(), encoded.get('parents').tolist()):
+        node = {"CAST_type": vocabulary.get_token(type_id), "CAST_body": []}
+        nodes.append((node, dict()))
+        if parent != Encoding.NO_PARENT:
+            nodes[parent][0].get("CAST_body").append(node)
+    attributes = zip(encoded.get('attribute_nodes').tolist(), encoded.get('attribute_items').tolist(),
+                     encoded.get('attribute_keys').tolist(), encoded.get('attribute_values').tolist(),
+                     encoded.get('attribute_json').tolist())
+    for position, item, key_id, value_position, is_json in attributes:
+        node, items = nodes[position]
+        value = data[offsets[value_position]:offsets[value_position + 1]].decode('utf-8')
+        if is_json:
+            value = json.loads(value)
+        body = node.get("CAST_body")
+        if key_id == value_id:
+            body.insert(item, value)
+        elif item in items:
+            items.get(item)[vocabulary.get_token(key_id)] = value
+        else:
+            items[item] = {vocabulary.get_token(key_id): value}
+            body.insert(item, items.get(item))
+    return nodes[0][0]
+
+
+def to_numpy(values):
+    """Convert array to numpy, using the smallest integer type able to hold it's values. Needs numpy."""
+    import numpy
+    values = numpy.asarray(values)
+    if values.size == 0:
+        return values
+    return values.astype(numpy.result_type(numpy.min_scalar_type(values.min()), numpy.min_scalar_type(values.max())))
+
+
+def save_npz(encoded: dict, file_name: str, compressed: bool = True):
+    """Save encoded cAST as a .npz archive, one .npy array per key. Needs numpy.
+
+    :param encoded: dict of arrays as given by encode()
+    :param file_name: path to output file
+    :param compressed: deflate arrays inside the archive
+    :return:
+    """
+    import numpy
+    save = numpy.savez_compressed if compressed else numpy.savez
+    save(file_name, **{key: to_numpy(values) for key, values in encoded.items()})
+
+
+def load_npz(file_name: str) -> dict:
+    """Load encoded cAST saved by save_npz(). Needs numpy.
+
+    :param file_name: path to .npz file
+    :return: dict of numpy arrays
+    """
+    import numpy
+    with numpy.load(file_name) as archive:
+        return {key: archive[key] for key in archive.files}
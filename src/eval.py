@@ -1,49 +1,126 @@
+import logging
 from src.logger import get_logger
 
 logger = get_logger('evaluation')
 
 
 def analyse(original_tree, custom_tree):
-    import json
-    original_tree_dict = json.loads(original_tree)
+    """Compare number of nodes and entities of the original AST and it's cAST.
+    cAST appearances and depths are the ones counted by custom_tree while it was built. cAST analysis
+    also tells the nodes saved by sharing equal subtrees, see Visitor.share_subtree().
+
+    :param original_tree: ast.AST tree as parsed
+    :param custom_tree: cAST built from original_tree
+    :return: dict with 'ast' and 'cast' analysis
+    """
     node_appearances_AST = dict()
-    iter_tree(original_tree_dict, node_appearances_AST, type_key="_type")
-    num_entities_ast = len(list(node_appearances_AST.keys()))
-    num_nodes_ast = sum(list(node_appearances_AST.values()))
-    ast_analysis = {'total_entities': num_entities_ast,
-                    'total_nodes': num_nodes_ast,
-                    'entities': list(node_appearances_AST.keys())}
-
-    custom_tree_dict = json.loads(custom_tree)
-    node_appearances_cAST = dict()
-    iter_tree(custom_tree_dict, node_appearances_cAST, type_key="CAST_type")
-    num_entities_cast = len(list(node_appearances_cAST.keys()))
-    num_nodes_cast = sum(list(node_appearances_cAST.values()))
-    cast_analysis = {'total_entities': num_entities_cast,
-                     'total_nodes': num_nodes_cast,
-                     'entities': list(node_appearances_cAST.keys())}
-    logger.debug("Analysis AST: Different entities '{}', Total nodes '{}'".format(num_entities_ast, num_nodes_ast))
-    logger.debug("Analysis cAST: Different entities '{}', Total nodes '{}'".format(num_entities_cast, num_nodes_cast))
+    depths_AST = list()
+    iter_ast(original_tree, node_appearances_AST, depths_AST)
+    ast_analysis = to_analysis(node_appearances_AST, depths_AST)
+    cast_analysis = to_analysis(custom_tree.entities, custom_tree.depths)
+    cast_analysis['shared_nodes'] = custom_tree.shared_nodes
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Analysis AST: Different entities '{}', Total nodes '{}'".format(
+            ast_analysis.get('total_entities'), ast_analysis.get('total_nodes')))
+        logger.debug("Analysis cAST: Different entities '{}', Total nodes '{}'".format(
+            cast_analysis.get('total_entities'), cast_analysis.get('total_nodes')))
     return {'ast': ast_analysis, 'cast': cast_analysis}
 
 
-def iter_tree(d, entities_tree, type_key):
-    for k, v in d.items():
-        if k == type_key:
-            if v in entities_tree:
-                curr_value = entities_tree.get(v)
-                entities_tree.update({v: curr_value + 1})
-            else:
-                entities_tree.update({v: 1})
-        if isinstance(v, dict):
-            iter_tree(v, entities_tree, type_key)
-        elif isinstance(v, list):
-            [iter_tree(element, entities_tree, type_key) for element in v if isinstance(element, dict)]
-
-
-if __name__ == "__main__":
-    #D1={"CAST_type": "Module", "CAST_body": [{"CAST_type": "Import", "CAST_body": [{"origin": "SYS"}, {"name": "pprint"}]}, {"CAST_type": "Import", "CAST_body": [{"origin": "UNK"}, {"name": "src.my_pretty.my_print"}]}, {"CAST_type": "FunctionDef", "CAST_body": [{"CAST_type": "arguments", "CAST_body": [{"CAST_type": "arg", "CAST_body": ["'list1'", "None"]}]}, {"CAST_type": "Loop", "CAST_body": [{"CAST_type": "Name", "CAST_body": [{"id": "'i'", "ctx": "Store"}]}, {"CAST_type": "Name", "CAST_body": [{"id": "'list1'", "ctx": "Load"}]}, {"CAST_type": "Expr", "CAST_body": [{"CAST_type": "Call", "CAST_body": [{"origin": "SYS"}, {"CAST_type": "Name", "CAST_body": [{"id": "'pprint'", "ctx": "Load"}]}, {"CAST_type": "Call", "CAST_body": [{"origin": "UNK"}, {"CAST_type": "Name", "CAST_body": [{"id": "'my_print'", "ctx": "Load"}]}, {"CAST_type": "Name", "CAST_body": [{"id": "'i'", "ctx": "Load"}]}]}]}]}]}]}]}
-    D1 = {"CAST_type": "Module","tests":{"inner":1}, "CAST_body": [{"CAST_type":"Name", "CAST_body": [{"origin": "SYS"}, {"name": "pprint"}]}]}
-    node_appearances = {}
-    iter_tree(D1, node_appearances)
-    print(node_appearances)
\ No newline at end of file
+def to_analysis(entities: dict, depths: list) -> dict:
+    """Analysis of a tree from appearances of each entity and number of nodes at each depth.
+
+    :param entities: dict of appearances by entity name
+    :param depths: list of number of nodes by depth
+    :return: dict
+    """
+    return {'total_entities': len(entities),
+            'total_nodes': sum(entities.values()),
+            'entities': list(entities.keys()),
+            'histogram': dict(entities),
+            'depths': list(depths)}
+
+
+def iter_ast(tree, entities_tree, depths_tree=None):
+    """Count appearances of each ast.AST class in tree, in depth-first order.
+
+    :param tree: ast.AST tree
+    :param entities_tree: dict where appearances are counted
+    :param depths_tree: list where nodes at each depth are counted. None to not count them
+    :return:
+    """
+    from ast import AST
+    stack = [(tree, 0)]
+    while stack:
+        node, depth = stack.pop()
+        name = node.__class__.__name__
+        entities_tree[name] = entities_tree.get(name, 0) + 1
+        if depths_tree is not None:
+            while len(depths_tree) <= depth:
+                depths_tree.append(0)
+            depths_tree[depth] += 1
+        childs = list()
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, AST):
+                childs.append((value, depth + 1))
+            elif isinstance(value, list):
+                childs.extend((element, depth + 1) for element in value if isinstance(element, AST))
+        stack.extend(reversed(childs))
+
+
+class Statistics:
+    """Data-set aggregate of analyse() reports: number of files, nodes, appearances of each entity and
+    nodes at each depth, for the AST and the cAST, together with cAST nodes saved by sharing subtrees and
+    files skipped for duplicating another one, exactly or not (see src.dataset.DedupIndex).
+    """
+    TREES = ('ast', 'cast')
+
+    def __init__(self):
+        self.files = 0
+        self.shared_nodes = 0
+        self.duplicates = {'exact': 0, 'near': 0}
+        self.nodes = {tree: 0 for tree in Statistics.TREES}
+        self.histograms = {tree: dict() for tree in Statistics.TREES}
+        self.depths = {tree: list() for tree in Statistics.TREES}
+
+    def add(self, report: dict):
+        """Add the report of a file.
+
+        :param report: dict given by analyse()
+        :return:
+        """
+        self.files += 1
+        self.shared_nodes += report.get('cast').get('shared_nodes', 0)
+        for tree in Statistics.TREES:
+            analysis = report.get(tree)
+            self._add(tree, analysis.get('total_nodes'), analysis.get('histogram'), analysis.get('depths'))
+
+    def _add(self, tree: str, nodes: int, histogram: dict, depths: list):
+        self.nodes[tree] += nodes
+        totals = self.histograms.get(tree)
+        for name, appearances in histogram.items():
+            totals[name] = totals.get(name, 0) + appearances
+        totals = self.depths.get(tree)
+        totals.extend([0] * (len(depths) - len(totals)))
+        for depth, count in enumerate(depths):
+            totals[depth] += count
+
+    def get_compression_ratio(self) -> float:
+        """Nodes of the AST for each node of the cAST, 0 when nothing was added."""
+        return self.nodes.get('ast') / self.nodes.get('cast') if self.nodes.get('cast') else 0.0
+
+    def get_duplicate_files(self) -> int:
+        return sum(self.duplicates.values())
+
+    def to_dict(self) -> dict:
+        return {'files': self.files,
+                'compression_ratio': self.get_compression_ratio(),
+                'duplicate_files': dict(self.duplicates),
+                'shared_nodes': self.shared_nodes,
+                'ast': {'total_nodes': self.nodes.get('ast'),
+                        'histogram': self.histograms.get('ast'),
+                        'depths': self.depths.get('ast')},
+                'cast': {'total_nodes': self.nodes.get('cast'),
+                         'histogram': self.histograms.get('cast'),
+                         'depths': self.depths.get('cast')}}
@@ -1,11 +1,63 @@
 import logging
 from src.constants import Logger
 
+# Handler every cAST logger record goes through, installed once by setup_logging() or init_worker().
+_handler = None
+_listener = None
 
-def get_logger(name: str) -> logging:
-    # Create logger
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
+
+class StartingHandler(logging.Handler):
+    """Handler installed by setup_logging(), replaced by the queue based one on the first record.
+    Runs that log nothing above their level do not pay for starting the listener thread, nor for
+    importing logging.handlers.
+    """
+    def emit(self, record):
+        start_listener().handle(record)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Get the logger of a module, child of the Logger.ROOT logger.
+    Handlers are only set up on the first call, so calling it again does not duplicate output.
+
+    :param name: name of the module logger
+    :return: logging.Logger
+    """
+    setup_logging()
+    return logging.getLogger(Logger.ROOT + '.' + name)
+
+
+def setup_logging(level: str = None):
+    """Set up the Logger.ROOT logger once. Records below level are discarded before being formatted,
+    the other ones are handled as described in start_listener().
+
+    :param level: name of the minimum level, one of Logger.LEVELS. None to keep the current one
+    :return:
+    """
+    global _handler
+    root = logging.getLogger(Logger.ROOT)
+    if level is not None:
+        root.setLevel(level)
+    if _handler is not None:
+        return
+    root.setLevel(level or Logger.LEVEL)
+    root.propagate = False
+    _handler = StartingHandler()
+    root.addHandler(_handler)
+
+
+def start_listener() -> logging.Handler:
+    """Replace the StartingHandler of the Logger.ROOT logger by a QueueHandler. Records put in it's queue
+    are written to console (INFO and above) and Logger.NAME file by a QueueListener thread, so writes
+    happen off the hot path.
+
+    :return: QueueHandler
+    """
+    global _handler, _listener
+    if _listener is not None:
+        return _handler
+    import atexit
+    import logging.handlers
+    import queue
 
     # Console Handler
     console_handler = logging.StreamHandler()
@@ -13,13 +65,55 @@ def get_logger(name: str) -> logging:
     console_format = logging.Formatter('%(name)s - %(levelname)s - %(message)s')
     console_handler.setFormatter(console_format)
 
-    # File Handler
-    file_handler = logging.FileHandler(Logger.NAME)
+    # File Handler, opened on the first record
+    file_handler = logging.FileHandler(Logger.NAME, delay=True)
     file_handler.setLevel(logging.DEBUG)
     file_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     file_handler.setFormatter(file_format)
 
-    # Add Handlers to logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
-    return logger
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger(Logger.ROOT)
+    root.removeHandler(_handler)
+    _handler = logging.handlers.QueueHandler(log_queue)
+    root.addHandler(_handler)
+    _listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler,
+                                               respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _handler
+
+
+def start_forwarding() -> tuple:
+    """Start handling records of worker processes in this process.
+    Workers send them through the returned queue once set up by init_worker().
+
+    :return: multiprocessing queue, QueueListener to stop once workers are done
+    """
+    import logging.handlers
+    import multiprocessing
+    setup_logging()
+    start_listener()
+    worker_queue = multiprocessing.Queue()
+    listener = logging.handlers.QueueListener(worker_queue, *_listener.handlers, respect_handler_level=True)
+    listener.start()
+    return worker_queue, listener
+
+
+def init_worker(worker_queue, level: int):
+    """Initializer of worker processes: send records of the Logger.ROOT logger to the process that
+    called start_forwarding(), instead of handling them in the worker.
+
+    :param worker_queue: queue given by start_forwarding()
+    :param level: level of the Logger.ROOT logger in the parent process
+    :return:
+    """
+    import logging.handlers
+    global _handler, _listener
+    root = logging.getLogger(Logger.ROOT)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    _handler = logging.handlers.QueueHandler(worker_queue)
+    _listener = None
+    root.addHandler(_handler)
+    root.setLevel(level)
+    root.propagate = False
@@ -0,0 +1,264 @@
+import ast
+import os
+import sys
+from src.cache import get_cache_dir
+from src.constants import Cache, Origin
+from src.logger import get_logger
+
+logger = get_logger('origin')
+
+
+class OriginResolver:
+    """Resolve origin of module names without importing or scanning them.
+    Possible origins:
+        - Origin.SYSTEM: module belongs to the standard library
+        - Origin.USER: module is found next to the analysed file
+        - Origin.UNKNOWN: any other module (third party, not installed...)
+    Standard library table is built once per interpreter and memoized on disk.
+    """
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or get_cache_dir()
+        self.stdlib = self.load_stdlib()
+        self.user_modules = dict()
+
+    def get_cache_path(self) -> str:
+        version = ".".join(str(number) for number in sys.version_info[:3])
+        tag = sys.implementation.cache_tag or sys.implementation.name
+        return os.path.join(self.cache_dir, Cache.STDLIB.format(tag=tag, version=version))
+
+    @staticmethod
+    def scan_stdlib() -> frozenset:
+        """Build table of top level modules of the standard library of running interpreter.
+        Python>=3.10 ships it as sys.stdlib_module_names, older versions scan the stdlib path.
+
+        :return: frozenset of module names
+        """
+        names = set(sys.builtin_module_names)
+        if hasattr(sys, 'stdlib_module_names'):
+            names.update(sys.stdlib_module_names)
+        else:
+            import pkgutil
+            import sysconfig
+            stdlib_path = sysconfig.get_paths()['stdlib']
+            paths = [stdlib_path, os.path.join(stdlib_path, 'lib-dynload')]
+            names.update(module.name for module in pkgutil.iter_modules(paths))
+        return frozenset(names)
+
+    def load_stdlib(self) -> frozenset:
+        """Load standard library table from disk, building and saving it when not found.
+
+        :return: frozenset of module names
+        """
+        import json
+        cache_path = self.get_cache_path()
+        try:
+            with open(cache_path) as file:
+                return frozenset(json.load(file))
+        except TimeoutError:
+            # Alarm of a data-set file taking too long, see src.dataset.analyse_file().
+            raise
+        except (OSError, ValueError):
+            pass
+        stdlib = self.scan_stdlib()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = "{}.{}".format(cache_path, os.getpid())
+            with open(tmp_path, 'w') as file:
+                json.dump(sorted(stdlib), file)
+            os.replace(tmp_path, cache_path)
+        except TimeoutError:
+            raise
+        except OSError as e:
+            logger.debug("Could not memoize standard library table in '{}': {}".format(cache_path, e))
+        return stdlib
+
+    def is_stdlib(self, module: str) -> bool:
+        return module.partition('.')[0] in self.stdlib
+
+    def is_user(self, module: str, directory: str) -> bool:
+        """Check if module is found next to the analysed file.
+
+        :param module: dotted module name
+        :param directory: directory of analysed file or None if unknown
+        :return: bool
+        """
+        if directory is None:
+            return False
+        key = (directory, module.partition('.')[0])
+        if key not in self.user_modules:
+            path = os.path.join(*key)
+            self.user_modules[key] = os.path.isfile(path + '.py') or os.path.isdir(path)
+        return self.user_modules.get(key)
+
+    def resolve_user_modules(self, tree: ast.AST, directory: str) -> list:
+        """Look for the modules absolutely imported by tree next to the analysed file. Relative imports
+        and standard library modules do not depend on the files around it, so they are left out.
+
+        :param tree: parsed file
+        :param directory: directory of analysed file
+        :return: sorted list of [top level module name, bool telling if it is a user module]
+        """
+        names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+                names.add(node.module)
+        modules = {name.partition('.')[0] for name in names if not self.is_stdlib(name)}
+        return [[module, self.is_user(module, directory)] for module in sorted(modules)]
+
+    def check_user_modules(self, user_modules: list, directory: str) -> bool:
+        """Check user modules found by resolve_user_modules() are still the same ones. They are looked for
+        on disk again, refreshing what is_user() memoized for them.
+
+        :param user_modules: list given by resolve_user_modules()
+        :param directory: directory of analysed file
+        :return: bool
+        """
+        for module, is_user in user_modules:
+            self.user_modules.pop((directory, module), None)
+            if self.is_user(module, directory) != is_user:
+                return False
+        return True
+
+    def forget_user_modules(self, directory: str):
+        """Forget what is_user() memoized for the modules of directory, so they are looked for on disk again.
+        Needed by long running processes, where files are added and removed between two analyses.
+
+        :param directory: directory of analysed file
+        :return:
+        """
+        for key in [key for key in self.user_modules if key[0] == directory]:
+            self.user_modules.pop(key, None)
+
+    def classify(self, module: str, directory: str = None) -> str:
+        """Get origin of module.
+
+        :param module: dotted module name
+        :param directory: directory of analysed file or None if unknown
+        :return: one of Origin.SYSTEM, Origin.USER, Origin.UNKNOWN
+        """
+        if self.is_stdlib(module):
+            return Origin.SYSTEM
+        elif self.is_user(module, directory):
+            return Origin.USER
+        return Origin.UNKNOWN
+
+    def resolve_imports(self, tree: ast.AST, filename: str = None) -> tuple:
+        """Resolve origin of the names bound by import statements of tree.
+        Names imported from a module get the origin of such module.
+
+        :param tree: parsed file
+        :param filename: path of parsed file, used to find user modules
+        :return: list of system names, list of user names
+        """
+        directory = os.path.dirname(os.path.abspath(filename)) if filename else None
+        imports = {Origin.SYSTEM: list(), Origin.USER: list(), Origin.UNKNOWN: list()}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    imports.get(self.classify(alias.name, directory)).append(alias.name)
+            elif isinstance(node, ast.ImportFrom):
+                if node.level:
+                    origin = Origin.USER
+                else:
+                    origin = self.classify(node.module, directory)
+                names = imports.get(origin)
+                if node.module:
+                    names.append(node.module)
+                names.extend(alias.name for alias in node.names)
+        return imports.get(Origin.SYSTEM), imports.get(Origin.USER)
+
+
+class OriginClassifier:
+    """Classify origin of dotted names, like 'print', 'np.array' or 'os.path.join', in O(len(name)).
+    Known names are held in a prefix trie of their dotted segments and a name gets the origin of the
+    longest known prefix. When a name is known with several origins, Origin.SYSTEM wins over
+    Origin.NATIVE, which wins over Origin.USER.
+    In-build names are shared by every file, see get_classifier(). Names imported by a file are added to
+    a copy of the shared classifier, see OriginClassifier.bind().
+    """
+    PRIORITY = (Origin.SYSTEM, Origin.NATIVE, Origin.USER)
+
+    def __init__(self, native=frozenset()):
+        self.trie = dict()
+        for name in native:
+            self.add(name, Origin.NATIVE)
+
+    def add(self, name: str, origin: str):
+        """Make name and every name below it, like 'name.attribute', of origin.
+
+        :param name: dotted name
+        :param origin: one of OriginClassifier.PRIORITY
+        :return:
+        """
+        node = self.trie
+        for segment in name.split('.'):
+            node = node.setdefault(segment, dict())
+        # Origin of a prefix is kept under None, which can not be a segment.
+        known = node.get(None)
+        if known is None or self.PRIORITY.index(origin) < self.PRIORITY.index(known):
+            node[None] = origin
+
+    def bind(self, system=(), user=()) -> 'OriginClassifier':
+        """Get a classifier knowing names of self and the names imported by a file.
+        Self is left untouched, so it can be shared across files.
+
+        :param system: names imported from the standard library
+        :param user: names imported from user modules
+        :return: OriginClassifier
+        """
+        classifier = OriginClassifier.__new__(OriginClassifier)
+        classifier.trie = self._copy(self.trie)
+        for name in system:
+            classifier.add(name, Origin.SYSTEM)
+        for name in user:
+            classifier.add(name, Origin.USER)
+        return classifier
+
+    @staticmethod
+    def _copy(node: dict) -> dict:
+        return {segment: child if segment is None else OriginClassifier._copy(child)
+                for segment, child in node.items()}
+
+    def classify(self, name: str) -> str:
+        """Get origin of the longest known prefix of name.
+
+        :param name: dotted name
+        :return: one of Origin.SYSTEM, Origin.NATIVE, Origin.USER, Origin.UNKNOWN
+        """
+        origin = Origin.UNKNOWN
+        node = self.trie
+        for segment in name.split('.'):
+            node = node.get(segment)
+            if node is None:
+                break
+            origin = node.get(None, origin)
+        return origin
+
+
+_resolver = None
+_classifiers = dict()
+
+
+def get_resolver() -> OriginResolver:
+    """Get the OriginResolver shared by the whole interpreter.
+
+    :return: OriginResolver
+    """
+    global _resolver
+    if _resolver is None:
+        _resolver = OriginResolver()
+    return _resolver
+
+
+def get_classifier(native=Origin.Buildin_Functions.INBUILD) -> OriginClassifier:
+    """Get the OriginClassifier of native names shared by the whole interpreter.
+
+    :param native: in-build names
+    :return: OriginClassifier
+    """
+    native = frozenset(native)
+    if native not in _classifiers:
+        _classifiers[native] = OriginClassifier(native)
+    return _classifiers.get(native)
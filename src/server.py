@@ -0,0 +1,199 @@
+import json
+import logging
+from src.constants import Metadata, Mode, Server
+from src.logger import get_logger
+
+logger = get_logger('server')
+
+
+def warm_up():
+    """Load what every request needs once per process: the Visitor and the origin tables."""
+    import src.visitor
+    from src.origin import get_classifier, get_resolver
+    get_resolver()
+    get_classifier()
+
+
+def init_worker(worker_queue, level: int, groups: dict):
+    """Initializer of server worker processes, see src.logger.init_worker() and warm_up().
+    Nodes are named with the groups of the parent process.
+    """
+    from src.cAST import Groups
+    from src.logger import init_worker as init_worker_logging
+    init_worker_logging(worker_queue, level)
+    Groups.configure(groups)
+    warm_up()
+
+
+def handle_request(line: str) -> str:
+    """Compress the source code of a request.
+    Requests are JSON objects with keys:
+        - source: source code to compress
+        - filename: path of the source code, used to resolve user imports, looked for on disk again for each
+          request. Without it no import is a user one and Server.FILENAME is answered
+        - mode: compiler mode, one of Mode.get_attr() (default: Mode.EXEC)
+        - report: also answer the comparison analysis between AST and cAST (default: false)
+        - id: any value, echoed in the response
+    Responses are JSON objects with keys id, filename and cast, plus report when asked, or error
+    instead of cast when the request could not be compressed.
+
+    :param line: JSON request
+    :return: JSON response, ending in a new line
+    """
+    request_id = None
+    filename = Server.FILENAME
+    try:
+        request = json.loads(line)
+        request_id = request.get('id')
+        filename = request.get('filename')
+        resolve_user = filename is not None
+        if resolve_user:
+            import os
+            from src.origin import get_resolver
+            get_resolver().forget_user_modules(os.path.dirname(os.path.abspath(filename)))
+        else:
+            filename = Server.FILENAME
+        from src.cAST_frontend import build
+        tree, c_ast = build(request['source'], filename, request.get('mode', Mode.EXEC), Metadata.NONE,
+                            resolve_user=resolve_user)
+        response = '{"id": ' + json.dumps(request_id) + ', "filename": ' + json.dumps(filename)
+        response += ', "cast": ' + "".join(c_ast.root.iter_json())
+        if request.get('report'):
+            from src.eval import analyse
+            response += ', "report": ' + json.dumps(analyse(tree, c_ast))
+        return response + '}\n'
+    except Exception as e:
+        error = "{}: {}".format(e.__class__.__name__, e)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Could not compress '{}': {}".format(filename, error))
+        return json.dumps({'id': request_id, 'filename': filename, 'error': error}) + '\n'
+
+
+def serve_stream(reader, writer, executor=None, pending: int = Server.PENDING):
+    """Answer JSON Lines requests read from reader, writing responses to writer in the order of requests.
+    With an executor, requests are handled concurrently by it while a thread writes responses as soon as
+    they are ready, at most pending requests being in flight. Requests the executor fails to handle are
+    answered with an error, and reading stops once responses can not be written anymore.
+
+    :param reader: text file object requests are read from, one per line
+    :param writer: text file object responses are written to, one per line
+    :param executor: concurrent.futures executor or None to handle requests in this thread
+    :param pending: requests in flight at most
+    :return:
+    """
+    if executor is None:
+        for line in reader:
+            if line.strip():
+                writer.write(handle_request(line))
+                writer.flush()
+        return
+    import queue
+    import threading
+    futures = queue.Queue(maxsize=pending)
+    disconnected = threading.Event()
+
+    def write_responses():
+        # Keeps taking futures until the end, so the reader never blocks on a full queue.
+        while True:
+            item = futures.get()
+            if item is None:
+                return
+            if disconnected.is_set():
+                continue
+            line, future = item
+            try:
+                response = future.result()
+            except Exception as e:
+                # The executor itself failed, for instance a worker process died.
+                try:
+                    request_id = json.loads(line).get('id')
+                except Exception:
+                    request_id = None
+                response = json.dumps({'id': request_id, 'error': "{}: {}".format(e.__class__.__name__, e)}) + '\n'
+            try:
+                writer.write(response)
+                writer.flush()
+            except (OSError, ValueError) as e:
+                logger.warning("Stopped answering requests, client went away: {}".format(e))
+                disconnected.set()
+
+    writer_thread = threading.Thread(target=write_responses, daemon=True)
+    writer_thread.start()
+    try:
+        for line in reader:
+            if disconnected.is_set():
+                break
+            if line.strip():
+                futures.put((line, executor.submit(handle_request, line)))
+    finally:
+        futures.put(None)
+        writer_thread.join()
+
+
+def serve(socket_path: str = None, jobs: int = 1):
+    """Serve compression requests until end of input, or forever when listening on socket_path.
+    The Visitor and origin tables are loaded once, in every worker process with jobs > 1.
+
+    :param socket_path: path of a Unix socket to listen on, each connection being served as in
+                        serve_stream(). None to serve stdin/stdout
+    :param jobs: number of worker processes. 0 uses every available core, 1 handles requests in this process
+    :return:
+    """
+    import os
+    import sys
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    warm_up()
+    executor = None
+    listener = None
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        from src.cAST import Groups
+        from src.logger import start_forwarding
+        worker_queue, listener = start_forwarding()
+        executor = ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                       initargs=(worker_queue, logger.getEffectiveLevel(), Groups.get_groups()))
+    pending = jobs * Server.PENDING_PER_JOB
+    try:
+        if socket_path is None:
+            serve_stream(sys.stdin, sys.stdout, executor, pending)
+        else:
+            serve_socket(socket_path, executor, pending)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+            listener.stop()
+
+
+def serve_socket(socket_path: str, executor=None, pending: int = Server.PENDING):
+    """Listen on a Unix socket, serving each connection in it's own thread.
+
+    :param socket_path: path of the socket, replaced if it is a leftover socket
+    :param executor: executor shared by connections or None to handle requests in connection threads
+    :param pending: requests in flight at most per connection
+    :return:
+    """
+    import io
+    import os
+    import signal
+    import socketserver
+    import stat
+    import sys
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            reader = io.TextIOWrapper(self.rfile, encoding='utf-8')
+            writer = io.TextIOWrapper(self.wfile, encoding='utf-8')
+            serve_stream(reader, writer, executor, pending)
+
+    if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+        os.remove(socket_path)
+    # Stopping the service with SIGTERM goes through the cleanup below, as KeyboardInterrupt does.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    with socketserver.ThreadingUnixStreamServer(socket_path, Handler) as server:
+        server.daemon_threads = True
+        logger.info("Serving on '{}'".format(socket_path))
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(socket_path)
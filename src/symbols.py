@@ -0,0 +1,61 @@
+from src.constants import Scope
+
+
+class SymbolTable:
+    """Table of the names bound by the scopes enclosing the node being visited.
+    Each name keeps a stack of it's bindings, innermost last, so resolving a name looks at the top of
+    it's stack instead of at each enclosing scope. Exiting a scope pops the bindings it made.
+    A name is bound to the fully qualified name it stands for, like 'numpy' for np after
+    `import numpy as np`, or to None when it is a local name, which shadows outer bindings.
+    """
+    def __init__(self):
+        self.bindings = dict()
+        self.scopes = [(Scope.MODULE, list())]
+
+    def enter(self, kind: str):
+        """Open a new innermost scope.
+
+        :param kind: one of Scope.MODULE, Scope.CLASS, Scope.FUNCTION
+        :return:
+        """
+        self.scopes.append((kind, list()))
+
+    def exit(self):
+        """Close the innermost scope, dropping the names bound in it.
+
+        :return:
+        """
+        _, names = self.scopes.pop()
+        for name in names:
+            stack = self.bindings.get(name)
+            stack.pop()
+            if not stack:
+                del self.bindings[name]
+
+    def bind(self, name: str, qualified: str = None):
+        """Bind name in the innermost scope, replacing a previous binding of it in the same scope.
+
+        :param name: bound name
+        :param qualified: fully qualified name that name stands for, None for a local name
+        :return:
+        """
+        level = len(self.scopes) - 1
+        stack = self.bindings.setdefault(name, list())
+        if stack and stack[-1][0] == level:
+            stack[-1] = (level, qualified)
+        else:
+            stack.append((level, qualified))
+            self.scopes[-1][1].append(name)
+
+    def resolve(self, name: str):
+        """Get the fully qualified name that name stands for in the innermost scope.
+        Bindings of enclosing class scopes are skipped, as Python does.
+
+        :param name: name to resolve
+        :return: fully qualified name, None when name is local, name itself when it is not bound
+        """
+        level = len(self.scopes) - 1
+        for binding_level, qualified in reversed(self.bindings.get(name, ())):
+            if binding_level == level or self.scopes[binding_level][0] != Scope.CLASS:
+                return qualified
+        return name
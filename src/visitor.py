@@ -1,4 +1,6 @@
+from src.constants import Metadata, Scope
 from src.logger import get_logger
+from src.symbols import SymbolTable
 import ast
 import src.cAST as cAST
 
@@ -8,13 +10,58 @@ logger = get_logger('Visitor')
 class Visitor(ast.NodeVisitor):
     """Visitor class to traverse ast
     While traversing existing ast, a custom AST (cAST) is persisted.
-    cAST takes in to account imports in code and their aliases in order to homogenise the ast.
+    cAST takes in to account imports in code and their aliases in order to homogenise the ast: names are
+    resolved against a table of the scopes enclosing the visited node, see src.symbols.SymbolTable.
+    Metadata of cAST nodes is built as chosen by metadata, one of Metadata.get_attr().
+    When a chunk_handler is given, the subtree of each function and class is pruned from the cAST as soon
+    as it is visited and handed over to chunk_handler(qualified_name, cAST), innermost first. The cAST of
+    the module is then left with the code outside functions and classes.
+    When share_subtrees is set, equal subtrees are held once (hash-consing): once the childs of a node are
+    visited, each one is replaced by the first equal subtree met, see Visitor.share_subtree(). Nodes
+    have no metadata then, as it is kept per node, and subtrees are not handed over to a chunk_handler.
     """
-    def __init__(self, inbuild_imports, sys_imports):
+    # ast.AST classes with a custom behaviour: name of the method extracting attributes of their nodes and
+    # whether traversal goes on below them. Nodes of any other class get the generic behaviour.
+    CUSTOM = {
+        ast.Import: ('_treat_import', False),
+        ast.ImportFrom: ('_treat_import', False),
+        ast.Name: ('_treat_name', False),
+        ast.Call: ('_treat_call', True),
+        ast.keyword: ('_treat_keyword', True),
+        ast.Attribute: ('_treat_attribute', True),
+    }
+    # ast.AST classes whose subtrees are handed over as cAST of their own when chunking.
+    CHUNKS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    # ast.AST classes opening a new scope of names.
+    SCOPES = {
+        ast.ClassDef: Scope.CLASS,
+        ast.FunctionDef: Scope.FUNCTION,
+        ast.AsyncFunctionDef: Scope.FUNCTION,
+        ast.Lambda: Scope.FUNCTION,
+        ast.ListComp: Scope.FUNCTION,
+        ast.SetComp: Scope.FUNCTION,
+        ast.DictComp: Scope.FUNCTION,
+        ast.GeneratorExp: Scope.FUNCTION,
+    }
+
+    def __init__(self, inbuild_imports, sys_imports, user_imports=None, metadata=Metadata.FULL,
+                 chunk_handler=None, share_subtrees=False):
+        from src.origin import get_classifier
         self.custom_ast = None
-        self.inbuild_imports = inbuild_imports
-        self.sys_imports = sys_imports
-        self.aliases = dict()
+        self.origins = get_classifier(inbuild_imports).bind(sys_imports, user_imports or list())
+        self.symbols = SymbolTable()
+        self.metadata = metadata
+        self.formatted = dict()
+        self.depth = 0
+        self.chunk_handler = chunk_handler
+        self.chunk_names = list()
+        if share_subtrees and metadata != Metadata.NONE:
+            raise ValueError("Subtrees can only be shared without metadata, got '{}'".format(metadata))
+        if share_subtrees and chunk_handler is not None:
+            raise ValueError("Subtrees can not be shared while chunking")
+        self.subtrees = dict() if share_subtrees else None
+        self.handlers = {node_class: (getattr(self, extractor), look_down)
+                         for node_class, (extractor, look_down) in Visitor.CUSTOM.items()}
 
     def set_custom_ast(self, cast):
         self.custom_ast = cast
@@ -22,8 +69,8 @@ class Visitor(ast.NodeVisitor):
     def get_custom_ast(self) -> cAST:
         return self.custom_ast
 
-    def save_alias(self, alias: str, original: str):
-        self.aliases.update({alias: original})
+    def save_alias(self, alias: str, original: str = None):
+        self.symbols.bind(alias, original)
 
     # =============================================================================================
     # Utils Visitor
@@ -57,16 +104,63 @@ class Visitor(ast.NodeVisitor):
         # Arrived to this point, should provide representation of primitive types like str, float, etc.
         return repr(node)
 
+    def _format_shared(self, node: ast):
+        """Get the same representation as Visitor._format() reusing the ones already computed for
+        visited childs. Each cached representation is handed over to it's parent, which keeps
+        formatting linear in the number of nodes.
+
+        :param node: Node to format
+        :return: dict representation of node
+        """
+        if isinstance(node, ast.AST):
+            if node in self.formatted:
+                return self.formatted.pop(node)
+            args = []
+            keywords = False
+            for field in node._fields:
+                try:
+                    value = getattr(node, field)
+                except AttributeError:
+                    keywords = True
+                else:
+                    if keywords:
+                        args.append({field: self._format_shared(value)})
+                    else:
+                        args.append(self._format_shared(value))
+            return {node.__class__.__name__: args}
+        elif isinstance(node, list):
+            return [self._format_shared(x) for x in node]
+        return repr(node)
+
     def alias2original(self, alias: str) -> str:
-        """Given an alias, search it in available ones and provide original name.
-        If not found, return same name.
+        """Given an alias, search it in the scopes enclosing the visited node and provide the fully
+        qualified name it stands for. If not found or bound by the code itself, return same name.
 
-        :param alias: key string to look in self.aliases
+        :param alias: name to look in self.symbols
         :return: linked name for alias
         """
-        if alias in self.aliases:
-            return self.aliases.get(alias)
-        return alias
+        qualified = self.symbols.resolve(alias)
+        return alias if qualified is None else qualified
+
+    def get_dotted_name(self, node: ast.AST):
+        """Get the dotted name called by node, like 'os.path.join' for os.path.join(). The leftmost name is
+        replaced by it's original one, so np.array() calls 'numpy.array'.
+
+        :param node: func of an ast.Call node
+        :return: dotted name, None when node does not name a function, like in f()() or x[0](), or when
+                 the leftmost name is local, since it's origin can not be known
+        """
+        attributes = list()
+        while isinstance(node, ast.Attribute):
+            attributes.append(node.attr)
+            node = node.value
+        if not isinstance(node, ast.Name):
+            return None
+        qualified = self.symbols.resolve(node.id)
+        if qualified is None:
+            return None
+        attributes.append(qualified)
+        return '.'.join(reversed(attributes))
 
     @staticmethod
     def get_generic_attributes(node: ast.AST) -> dict:
@@ -78,9 +172,9 @@ class Visitor(ast.NodeVisitor):
         """
         return Visitor._format(node).values()
 
-    @staticmethod
-    def initialise_child(parent: cAST.Node, child: ast):
+    def initialise_child(self, parent: cAST.Node, child: ast):
         """Create cAST node given child ast node. Set child's parent. Set child as parent's child.
+        Register the new node in the cAST index, one level below the node being visited.
 
         :param parent: parent ast node
         :param child: child ast node
@@ -89,6 +183,46 @@ class Visitor(ast.NodeVisitor):
         cast_child = cAST.Node(child)
         cast_child.set_parent(parent)
         parent.set_child(cast_child)
+        self.get_custom_ast().register_node(cast_child, self.depth + 1)
+
+    def share_subtree(self, node: cAST.Node) -> cAST.Node:
+        """Get the first visited subtree equal to the one of node, or node itself when there is none.
+        Childs of node must already be shared, so two subtrees are equal when their roots have the same name
+        and attributes and the very same childs: the structural key of a node is built bottom-up in O(childs).
+        Only the root of an equal subtree is then discarded, it is counted in cAST.shared_nodes.
+        A shared node has several parents, so it's parent link is dropped.
+
+        :param node: cAST node whose childs are shared
+        :return: cAST node
+        """
+        key = (node.name, node.is_default_attributes, repr(node.attributes), tuple(map(id, node.childs)))
+        shared = self.subtrees.get(key)
+        if shared is None:
+            self.subtrees[key] = node
+            return node
+        self.get_custom_ast().shared_nodes += 1
+        shared.parent = None
+        return shared
+
+    def enter_scope(self, node: ast.AST, kind: str):
+        """Open the scope of node. The name of a function or class is bound in the enclosing scope, it's
+        arguments in the new one.
+
+        :param node: ast.AST node opening a scope, see Visitor.SCOPES
+        :param kind: one of Scope.CLASS, Scope.FUNCTION
+        :return:
+        """
+        name = getattr(node, 'name', None)
+        if name is not None:
+            self.save_alias(name)
+        self.symbols.enter(kind)
+        arguments = getattr(node, 'args', None)
+        if isinstance(arguments, ast.arguments):
+            for arg in arguments.posonlyargs + arguments.args + arguments.kwonlyargs:
+                self.save_alias(arg.arg)
+            for arg in (arguments.vararg, arguments.kwarg):
+                if arg is not None:
+                    self.save_alias(arg.arg)
 
     # END Utils Visitor
     # ---------------------------------------------------------------------------------------------
@@ -97,6 +231,20 @@ class Visitor(ast.NodeVisitor):
     # Generic TRAVERSE OF ast.AST
     # =============================================================================================
 
+    def visit(self, node):
+        """Visit node with the custom behaviour of it's class, see Visitor.CUSTOM, or the generic one.
+        Handlers are found with one lookup by class in self.handlers, instead of the visit_ method name
+        ast.NodeVisitor builds for each node.
+
+        :param node: ast.AST Node to traverse
+        :return:
+        """
+        handler = self.handlers.get(node.__class__)
+        if handler is None:
+            self.generic_visit(node)
+        else:
+            self.visit_custom(node, *handler)
+
     def generic_visit(self, node, general_behaviour=True, look_down=True):
         """Shared/Generic behaviour when visiting node.
 
@@ -105,26 +253,51 @@ class Visitor(ast.NodeVisitor):
         :param look_down: keep recursive traversal after this node
         :return:
         """
-        metadata = self._format(node)
+        cast_node = None
+        metadata = None
+        if self.metadata == Metadata.FULL:
+            metadata = self._format(node)
         if isinstance(node, ast.Module):
-            node_module = cAST.Node(node)
-            node_module.set_metadata(metadata)
-            self.populate_CAST_node(node_module)
-            cast_module = cAST.cAST(root=node_module)
+            cast_node = cAST.Node(node)
+            cast_module = cAST.cAST(root=cast_node)
             self.set_custom_ast(cast_module)
+            self.populate_CAST_node(cast_node)
         elif isinstance(node, ast.AST):
             cast_node = self.get_custom_ast().find_node(node)
-            cast_node.set_metadata(metadata)
             if general_behaviour:
                 cast_node.set_is_default_attributes(general_behaviour)
                 self.populate_CAST_node(cast_node)
         else:
             logger.error('expected ast.AST or ast.Module, got %r' % node.__class__.__name__)
+        chunk = self.chunk_handler is not None and isinstance(node, Visitor.CHUNKS)
+        if chunk:
+            self.chunk_names.append(node.name)
         if look_down:
+            scope = Visitor.SCOPES.get(node.__class__)
+            if scope is not None:
+                self.enter_scope(node, scope)
+            self.depth += 1
             ast.NodeVisitor.generic_visit(self, node)
-
-    @staticmethod
-    def populate_CAST_node(node: cAST):
+            self.depth -= 1
+            if scope is not None:
+                self.symbols.exit()
+        # Shared metadata is formatted once childs are visited, so their representation is reused.
+        if self.metadata == Metadata.SHARED and cast_node is not None:
+            metadata = self._format_shared(node)
+            if isinstance(node, ast.Module):
+                self.formatted.clear()
+            else:
+                self.formatted[node] = metadata
+        if cast_node is not None:
+            cast_node.set_metadata(metadata)
+            if self.subtrees is not None and cast_node.childs:
+                cast_node.childs = [self.share_subtree(child) for child in cast_node.childs]
+        if chunk:
+            qualified_name = '.'.join(self.chunk_names)
+            self.chunk_names.pop()
+            self.chunk_handler(qualified_name, self.get_custom_ast().prune(cast_node, self.depth, node.name))
+
+    def populate_CAST_node(self, node: cAST):
         """Given a CAST node, create subsequent CAST childs and link them to node.
         If no child found, that node is a leaf node. Get attributes and set_attributes().
         If childs found, that node is a parent node. Initialise childs.
@@ -136,12 +309,13 @@ class Visitor(ast.NodeVisitor):
         iterator = ast.iter_child_nodes(ast_node)
         try:
             first_child = next(iterator)
-            Visitor.initialise_child(parent=node, child=first_child)
+            self.initialise_child(parent=node, child=first_child)
         except StopIteration:
-            attributes = Visitor.get_generic_attributes(ast_node)
+            # A tuple holds the same values without keeping the formatted dict alive.
+            attributes = tuple(Visitor.get_generic_attributes(ast_node))
             node.set_attributes(attributes)
         for child in iterator:
-            Visitor.initialise_child(parent=node, child=child)
+            self.initialise_child(parent=node, child=child)
 
     # END Generic TRAVERSE OF ast.AST
     # ---------------------------------------------------------------------------------------------
@@ -151,41 +325,44 @@ class Visitor(ast.NodeVisitor):
     # =============================================================================================
 
     def _treat_import(self, node):
-        from src.constants import Origin
         attributes = list()
         for alias in node.names:
-            if alias.asname is not None:
-                self.save_alias(alias=alias.asname, original=alias.name)
-            if alias.name in self.inbuild_imports:
-                attributes.append({"origin": Origin.NATIVE})
-            elif alias.name in self.sys_imports:
-                attributes.append({"origin": Origin.SYSTEM})
-            else:
-                attributes.append({"origin": Origin.UNKNOWN})
+            self._bind_import(node, alias)
+            attributes.append({"origin": self.origins.classify(alias.name)})
             if isinstance(node, ast.ImportFrom):
-                attributes.append({"name": node.module + "." + alias.name})
+                attributes.append({"name": node.module + "." + alias.name if node.module else alias.name})
             elif isinstance(node, ast.Import):
                 attributes.append({"name": alias.name})
             else:
                 raise("Non accepted class in Import treatment.")
         return attributes
 
-    def visit_Import(self, node):
-        cast_node = self.get_custom_ast().find_node(node)
-        attributes = self._treat_import(node)
-        cast_node.set_is_default_attributes(False)
-        cast_node.set_attributes(attributes)
-        self.generic_visit(node, general_behaviour=False, look_down=False)
+    def _bind_import(self, node, alias: ast.alias):
+        """Bind the name imported by alias to it's fully qualified name: np to 'numpy' for
+        `import numpy as np`, path to 'os.path' for `from os import path`. Names relatively imported keep
+        their own name, as their package is unknown.
 
-    def visit_ImportFrom(self, node):
-        cast_node = self.get_custom_ast().find_node(node)
-        attributes = self._treat_import(node)
-        cast_node.set_is_default_attributes(False)
-        cast_node.set_attributes(attributes)
-        self.generic_visit(node, general_behaviour=False, look_down=False)
+        :param node: ast.Import or ast.ImportFrom node
+        :param alias: one of node.names
+        :return:
+        """
+        if alias.name == '*':
+            return
+        if isinstance(node, ast.Import):
+            if alias.asname is None:
+                name = alias.name.partition('.')[0]
+                self.save_alias(alias=name, original=name)
+            else:
+                self.save_alias(alias=alias.asname, original=alias.name)
+        elif node.level or not node.module:
+            self.save_alias(alias=alias.asname or alias.name, original=alias.name)
+        else:
+            self.save_alias(alias=alias.asname or alias.name, original=node.module + "." + alias.name)
 
-    @staticmethod
-    def _treat_name(node) -> list:
+    def _treat_name(self, node) -> list:
+        if not isinstance(node.ctx, ast.Load):
+            # Names assigned or deleted by the code are local, they shadow imported ones.
+            self.save_alias(node.id)
         attributes = list()
         formatted_node = Visitor._format(node)
         name_values = list(formatted_node.values())[0]  # format: [[id, {action: [args]}]]
@@ -195,39 +372,19 @@ class Visitor(ast.NodeVisitor):
         attributes.append({"id": id, "ctx": action})
         return attributes
 
-    def visit_NameConstant(self, node):
-        self.generic_visit(node)
-
-    def visit_Name(self, node):
-        cast_node = self.get_custom_ast().find_node(node)
-        attributes = self._treat_name(node)
-        cast_node.set_is_default_attributes(False)
-        cast_node.set_attributes(attributes)
-        self.generic_visit(node, general_behaviour=False, look_down=False)
-
     def _treat_call(self, node: ast) -> list:
         from src.constants import Origin
         attributes = list()
-        func_call = node.__dict__.get('func')
-        original_id = self.alias2original(func_call.__dict__.get('id'))
-        if original_id in self.sys_imports:
-            attributes.append({'origin': Origin.SYSTEM})
-        elif original_id in self.inbuild_imports:
-            attributes.append({'origin': Origin.NATIVE})
-        else:
+        func_call = node.func
+        name = self.get_dotted_name(func_call)
+        if name is None:
             attributes.append({'origin': Origin.UNKNOWN})
-        change_id = {'id': original_id}
-        func_call.__dict__.update(change_id)
+        else:
+            attributes.append({'origin': self.origins.classify(name)})
+        if isinstance(func_call, ast.Name) and name is not None:
+            func_call.id = name
         return attributes
 
-    def visit_Call(self, node):
-        cast_node = self.get_custom_ast().find_node(node)
-        attributes = self._treat_call(node)
-        cast_node.set_is_default_attributes(False)
-        cast_node.set_attributes(attributes)
-        self.populate_CAST_node(cast_node)
-        self.generic_visit(node, general_behaviour=False, look_down=True)
-
     @staticmethod
     def _treat_keyword(node: ast) -> list:
         attributes = list()
@@ -235,14 +392,6 @@ class Visitor(ast.NodeVisitor):
         attributes.append({'arg': arg})
         return attributes
 
-    def visit_keyword(self, node):
-        cast_node = self.get_custom_ast().find_node(node)
-        attributes = self._treat_keyword(node)
-        cast_node.set_is_default_attributes(False)
-        cast_node.set_attributes(attributes)
-        self.populate_CAST_node(cast_node)
-        self.generic_visit(node, general_behaviour=False, look_down=True)
-
     @staticmethod
     def _treat_attribute(node: ast) -> list:
         attributes = list()
@@ -250,296 +399,22 @@ class Visitor(ast.NodeVisitor):
         attributes.append({'attr': attr})
         return attributes
 
-    def visit_Attribute(self, node):
+    def visit_custom(self, node, extractor, look_down: bool):
+        """Custom behaviour when visiting node: it's cAST node gets the attributes given by extractor.
+        When traversal goes on below node, it's cAST node also gets it's childs.
+
+        :param node: ast.AST Node being traversed
+        :param extractor: method of self getting attributes of node
+        :param look_down: keep recursive traversal after this node
+        :return:
+        """
         cast_node = self.get_custom_ast().find_node(node)
-        attributes = self._treat_attribute(node)
+        attributes = extractor(node)
         cast_node.set_is_default_attributes(False)
         cast_node.set_attributes(attributes)
-        self.populate_CAST_node(cast_node)
-        self.generic_visit(node, general_behaviour=False, look_down=True)
+        if look_down:
+            self.populate_CAST_node(cast_node)
+        self.generic_visit(node, general_behaviour=False, look_down=look_down)
 
     # END CUSTOM visit for ast.AST node
     # ---------------------------------------------------------------------------------------------
-
-    # =============================================================================================
-    # DEFAULT visit for ast.AST node
-    # =============================================================================================
-
-    def visit_Num(self, node):
-        self.generic_visit(node)
-
-    def visit_Str(self, node):
-        self.generic_visit(node)
-
-    def visit_FormattedValue(self, node):
-        self.generic_visit(node)
-
-    def visit_JoinedStr(self, node):
-        self.generic_visit(node)
-
-    def visit_Bytes(self, node):
-        self.generic_visit(node)
-
-    def visit_List(self, node):
-        self.generic_visit(node)
-
-    def visit_Tuple(self, node):
-        self.generic_visit(node)
-
-    def visit_Set(self, node):
-        self.generic_visit(node)
-
-    def visit_Dict(self, node):
-        self.generic_visit(node)
-
-    def visit_Ellipsis(self, node):
-        self.generic_visit(node)
-
-    def visit_Load(self, node):
-        self.generic_visit(node)
-
-    def visit_Store(self, node):
-        self.generic_visit(node)
-
-    def visit_Del(self, node):
-        self.generic_visit(node)
-
-    def visit_Starred(self, node):
-        self.generic_visit(node)
-
-    def visit_Expr(self, node):
-        self.generic_visit(node)
-
-    def visit_UnaryOp(self, node):
-        self.generic_visit(node)
-
-    def visit_UAdd(self, node):
-        self.generic_visit(node)
-
-    def visit_USub(self, node):
-        self.generic_visit(node)
-
-    def visit_Not(self, node):
-        self.generic_visit(node)
-
-    def visit_Invert(self, node):
-        self.generic_visit(node)
-
-    def visit_BinOp(self, node):
-        self.generic_visit(node)
-
-    def visit_Add(self, node):
-        self.generic_visit(node)
-
-    def visit_Sub(self, node):
-        self.generic_visit(node)
-
-    def visit_Mult(self, node):
-        self.generic_visit(node)
-
-    def visit_Div(self, node):
-        self.generic_visit(node)
-
-    def visit_FloorDiv(self, node):
-        self.generic_visit(node)
-
-    def visit_Mod(self, node):
-        self.generic_visit(node)
-
-    def visit_Pow(self, node):
-        self.generic_visit(node)
-
-    def visit_LShift(self, node):
-        self.generic_visit(node)
-
-    def visit_RShift(self, node):
-        self.generic_visit(node)
-
-    def visit_BitOr(self, node):
-        self.generic_visit(node)
-
-    def visit_BitXor(self, node):
-        self.generic_visit(node)
-
-    def visit_BitAnd(self, node):
-        self.generic_visit(node)
-
-    def visit_MatMult(self, node):
-        self.generic_visit(node)
-
-    def visit_BoolOp(self, node):
-        self.generic_visit(node)
-
-    def visit_And(self, node):
-        self.generic_visit(node)
-
-    def visit_Or(self, node):
-        self.generic_visit(node)
-
-    def visit_Compare(self, node):
-        self.generic_visit(node)
-
-    def visit_Eq(self, node):
-        self.generic_visit(node)
-
-    def visit_NotEq(self, node):
-        self.generic_visit(node)
-
-    def visit_Lt(self, node):
-        self.generic_visit(node)
-
-    def visit_LtE(self, node):
-        self.generic_visit(node)
-
-    def visit_Gt(self, node):
-        self.generic_visit(node)
-
-    def visit_GtE(self, node):
-        self.generic_visit(node)
-
-    def visit_Is(self, node):
-        self.generic_visit(node)
-
-    def visit_IsNot(self, node):
-        self.generic_visit(node)
-
-    def visit_In(self, node):
-        self.generic_visit(node)
-
-    def visit_NotIn(self, node):
-        self.generic_visit(node)
-
-    def visit_IfExp(self, node):
-        self.generic_visit(node)
-
-    def visit_Subscript(self, node):
-        self.generic_visit(node)
-
-    def visit_Index(self, node):
-        self.generic_visit(node)
-
-    def visit_Slice(self, node):
-        self.generic_visit(node)
-
-    def visit_ExtSlice(self, node):
-        self.generic_visit(node)
-
-    def visit_ListComp(self, node):
-        self.generic_visit(node)
-
-    def visit_SetComp(self, node):
-        self.generic_visit(node)
-
-    def visit_GeneratorExp(self, node):
-        self.generic_visit(node)
-
-    def visit_DictComp(self, node):
-        self.generic_visit(node)
-
-    def visit_comprehension(self, node):
-        self.generic_visit(node)
-
-    def visit_Assign(self, node):
-        self.generic_visit(node)
-
-    def visit_AnnAssign(self, node):
-        self.generic_visit(node)
-
-    def visit_AugAssign(self, node):
-        self.generic_visit(node)
-
-    def visit_Print(self, node):
-        self.generic_visit(node)
-
-    def visit_Raise(self, node):
-        self.generic_visit(node)
-
-    def visit_Assert(self, node):
-        self.generic_visit(node)
-
-    def visit_Delete(self, node):
-        self.generic_visit(node)
-
-    def visit_Pass(self, node):
-        self.generic_visit(node)
-
-    def visit_alias(self, node):
-        self.generic_visit(node)
-
-    def visit_If(self, node):
-        self.generic_visit(node)
-
-    def visit_For(self, node):
-        self.generic_visit(node)
-
-    def visit_While(self, node):
-        self.generic_visit(node)
-
-    def visit_Break(self, node):
-        self.generic_visit(node)
-
-    def visit_Continue(self, node):
-        self.generic_visit(node)
-
-    def visit_Try(self, node):
-        self.generic_visit(node)
-
-    def visit_TryFinally(self, node):
-        self.generic_visit(node)
-
-    def visit_TryExcept(self, node):
-        self.generic_visit(node)
-
-    def visit_ExceptHandler(self, node):
-        self.generic_visit(node)
-
-    def visit_With(self, node):
-        self.generic_visit(node)
-
-    def visit_withitem(self, node):
-        self.generic_visit(node)
-
-    def visit_FunctionDef(self, node):
-        self.generic_visit(node)
-
-    def visit_Lambda(self, node):
-        self.generic_visit(node)
-
-    def visit_arguments(self, node):
-        self.generic_visit(node)
-
-    def visit_arg(self, node):
-        self.generic_visit(node)
-
-    def visit_Return(self, node):
-        self.generic_visit(node)
-
-    def visit_Yield(self, node):
-        self.generic_visit(node)
-
-    def visit_YieldFrom(self, node):
-        self.generic_visit(node)
-
-    def visit_Global(self, node):
-        self.generic_visit(node)
-
-    def visit_Nonlocal(self, node):
-        self.generic_visit(node)
-
-    def visit_ClassDef(self, node):
-        self.generic_visit(node)
-
-    def visit_AsyncFunctionDef(self, node):
-        self.generic_visit(node)
-
-    def visit_Await(self, node):
-        self.generic_visit(node)
-
-    def visit_AsyncFor(self, node):
-        self.generic_visit(node)
-
-    def visit_AsyncWith(self, node):
-        self.generic_visit(node)
-
-    # END DEFAULT visit for ast.AST node
-    # ---------------------------------------------------------------------------------------------
\ No newline at end of file
@@ -1,6 +1,7 @@
 import unittest
-from src.cAST_frontend import compress
-from src.constants import Mode, Output
+from src.cAST_frontend import build, compress
+from src.constants import Cache, Metadata, Mode, Output, Origin
+from src.visitor import Visitor
 
 
 class TestCAST(unittest.TestCase):
@@ -24,11 +25,16 @@ class TestCAST(unittest.TestCase):
         true_eval = {'ast':
                          {'total_entities': 1,
                           'total_nodes': 1,
-                          'entities': ['Module']},
+                          'entities': ['Module'],
+                          'histogram': {'Module': 1},
+                          'depths': [1]},
                      'cast':
                          {'total_entities': 1,
                           'total_nodes': 1,
-                          'entities': ['Module']}
+                          'entities': ['Module'],
+                          'histogram': {'Module': 1},
+                          'depths': [1],
+                          'shared_nodes': 0}
                      }
         assert(eval == true_eval)
 
@@ -77,6 +83,675 @@ class TestCAST(unittest.TestCase):
         assert cast_nodes_eval < ast_nodes_eval
         assert cast_entities_eval < ast_entities_eval
 
+    def test_compress_many(self):
+        """Check in-memory sources are compressed as from files, skipping the ones failing to be compressed.
+
+        :return:
+        """
+        import json
+        from src.cAST_frontend import compress_many
+        sources = [('fast_sort', open('tests/fast_sort.py').read()), ('broken', 'def ('), ('empty', b'')]
+        results = list(compress_many(sources, output_type=Output.Format.JSON, report=True))
+        assert [name for name, _, _ in results] == ['fast_sort', 'broken', 'empty']
+        _, c_ast = build(sources[0][1], 'tests/fast_sort.py', Mode.EXEC, Metadata.NONE)
+        assert json.loads(results[0][1]) == c_ast.root.to_dict()
+        assert results[1][1:] == (None, None)
+        assert results[2][2].get('cast').get('total_nodes') == 1
+        name, c_ast, _ = next(compress_many(sources[:1]))
+        assert c_ast.root.get_ast_node() is None
+        sources = [('relative', 'from . import x\nfrom .m import y\n'), ('expression', 'x + 1')]
+        assert [result for _, result, _ in compress_many(sources, mode=Mode.EVAL)] == [None, None]
+        (_, result, _), = compress_many(sources[:1], output_type=Output.Format.JSON)
+        imports = json.loads(result).get('CAST_body')
+        assert [attributes.get('CAST_body')[1] for attributes in imports] == [{'name': 'x'}, {'name': 'm.y'}]
+
+    def test_json_file(self):
+        """Check JSON file output holds the cAST document itself, and not it encoded as a string.
+
+        :return:
+        """
+        import json
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as output_dir:
+            output_file = os.path.join(output_dir, 'cast.json')
+            compress(
+                file=open('tests/test_file.py').read(),
+                filename='tests/test_file.py',
+                mode=Mode.EXEC,
+                output_type=Output.Format.JSON,
+                output_file=output_file,
+                report=False,
+                dataset_path=None,
+                compact=True
+            )
+            with open(output_file) as file:
+                document = file.read()
+        assert json.loads(document).get('CAST_type') == 'Module'
+        assert ', "' not in document
+
+
+class TestGroups(unittest.TestCase):
+    def test_configure(self):
+        """Check node names follow configured groups, constants being grouped by the type of their value.
+
+        :return:
+        """
+        from src.cAST import Groups
+        source = 'for i in range(3):\n    x = (y := 2.5) or None\n'
+        try:
+            Groups.configure({'For': 'Loop', 'NamedExpr': 'Assign', 'Num': 'Number'})
+            _, c_ast = build(source, 'tests/test_groups.py', Mode.EXEC, Metadata.NONE)
+            assert c_ast.entities.get('Loop') == 1 and c_ast.entities.get('Assign') == 2
+            assert c_ast.entities.get('Number') == 2 and c_ast.entities.get('Constant') == 1
+            with self.assertRaises(ValueError):
+                Groups.configure({'Unknown': 'Name'})
+        finally:
+            Groups.configure()
+        _, c_ast = build(source, 'tests/test_groups.py', Mode.EXEC, Metadata.NONE)
+        assert 'Number' not in c_ast.entities and c_ast.entities.get('Name') == 5
+
+
+class TestChunks(unittest.TestCase):
+    def test_chunks(self):
+        """Check functions and classes are handed over innermost first, and every node is found in one chunk.
+
+        :return:
+        """
+        from src.cAST import cAST
+        source = ('import os\nclass C:\n    def g(self):\n        def inner():\n            return os.sep\n'
+                  '        return inner()\nasync def h():\n    pass\nprint(C().g())\n')
+        chunks = list()
+        _, c_ast = build(source, 'tests/test_chunks.py', Mode.EXEC, Metadata.NONE,
+                         chunk_handler=lambda name, chunk: chunks.append((name, chunk)))
+        assert [name for name, _ in chunks] == ['C.g.inner', 'C.g', 'C', 'h']
+        assert [node.attributes for node in c_ast.root.childs[1:3]] == [[{'name': 'C'}], [{'name': 'h'}]]
+        _, whole = build(source, 'tests/test_chunks.py', Mode.EXEC, Metadata.NONE)
+        trees = [chunk for _, chunk in chunks] + [c_ast]
+        assert sum(sum(tree.entities.values()) for tree in trees) == sum(whole.entities.values()) + len(chunks)
+        for tree in trees:
+            rebuilt = cAST.from_state(*tree.__reduce__()[1])
+            assert (rebuilt.entities, rebuilt.depths) == (tree.entities, tree.depths)
+
+
+class TestSharing(unittest.TestCase):
+    def test_share_subtrees(self):
+        """Check equal subtrees are held once without changing the cAST, and only without metadata.
+
+        :return:
+        """
+        source = open('tests/fast_sort.py').read()
+        _, c_ast = build(source, 'tests/fast_sort.py', Mode.EXEC, Metadata.NONE)
+        _, shared = build(source, 'tests/fast_sort.py', Mode.EXEC, Metadata.NONE, share_subtrees=True)
+        assert "".join(shared.root.iter_json()) == "".join(c_ast.root.iter_json())
+        assert (shared.entities, shared.depths) == (c_ast.entities, c_ast.depths)
+        assert c_ast.shared_nodes == 0 and shared.shared_nodes > 0
+        nodes, distinct = [shared.root], set()
+        while nodes:
+            node = nodes.pop()
+            distinct.add(id(node))
+            nodes.extend(node.childs)
+        assert len(distinct) == sum(c_ast.entities.values()) - shared.shared_nodes
+        parents = [shared.root]
+        while parents:
+            parent = parents.pop()
+            for child in parent.childs:
+                assert child.get_parent() in (parent, None)
+            parents.extend(parent.childs)
+        with self.assertRaises(ValueError):
+            shared.prune(shared.root.childs[0], 1, 'f')
+        with self.assertRaises(ValueError):
+            build(source, 'tests/fast_sort.py', Mode.EXEC, Metadata.FULL, share_subtrees=True)
+        with self.assertRaises(ValueError):
+            build(source, 'tests/fast_sort.py', Mode.EXEC, Metadata.NONE, share_subtrees=True,
+                  chunk_handler=print)
+
+
+class TestEncoding(unittest.TestCase):
+    def test_encode(self):
+        """Check integer encoded cAST decodes back to it's dict representation.
+
+        :return:
+        """
+        import ast
+        import json
+        from src.encoding import decode, encode, get_vocabulary
+        visitor = Visitor(inbuild_imports=Origin.Buildin_Functions.INBUILD, sys_imports=['pprint'])
+        visitor.visit(ast.parse(open('tests/test_file.py').read()))
+        c_ast = visitor.get_custom_ast()
+        encoded = encode(c_ast)
+        assert get_vocabulary().get_token(encoded.get('types')[0]) == 'Module'
+        assert encoded.get('parents')[0] == -1
+        assert decode(encoded) == json.loads(c_ast.jsonify(None, return_string=True))
+
+
+class TestCASTIndex(unittest.TestCase):
+    def test_find_node(self):
+        """Check every ast.AST node visited can be found in the cAST index.
+
+        :return:
+        """
+        import ast
+        tree = ast.parse(open('tests/fast_sort.py').read())
+        visitor = Visitor(inbuild_imports=Origin.Buildin_Functions.INBUILD, sys_imports=list())
+        visitor.visit(tree)
+        c_ast = visitor.get_custom_ast()
+        assert c_ast.find_node(tree) is c_ast.root
+        for node in ast.walk(tree):
+            cast_node = c_ast.find_node(node)
+            if cast_node is not None:
+                assert cast_node.get_ast_node() is node
+        function = tree.body[0]
+        assert c_ast.find_node(function).get_parent() is c_ast.root
+
+    def test_release_ast(self):
+        """Check a cAST keeps it's JSON representation after dropping links to the original tree.
+
+        :return:
+        """
+        import ast
+        tree = ast.parse(open('tests/fast_sort.py').read())
+        visitor = Visitor(inbuild_imports=Origin.Buildin_Functions.INBUILD, sys_imports=list())
+        visitor.visit(tree)
+        c_ast = visitor.get_custom_ast()
+        json_custom_ast = c_ast.jsonify(None, return_string=True)
+        c_ast.release_ast()
+        assert c_ast.find_node(tree) is None
+        assert c_ast.root.get_ast_node() is None
+        assert c_ast.jsonify(None, return_string=True) == json_custom_ast
+
+    def test_pickle(self):
+        """Check a pickled cAST is rebuilt with the same tree and parent links, without ast.AST links.
+
+        :return:
+        """
+        import pickle
+        _, c_ast = build(open('tests/fast_sort.py').read(), 'tests/fast_sort.py', Mode.EXEC)
+        loaded = pickle.loads(pickle.dumps(c_ast, protocol=pickle.HIGHEST_PROTOCOL))
+        assert loaded.root.to_dict() == c_ast.root.to_dict()
+        nodes = [loaded.root]
+        while nodes:
+            node = nodes.pop()
+            assert node.get_ast_node() is None
+            assert all(child.get_parent() is node for child in node.childs)
+            nodes.extend(node.childs)
+
+    def test_iter_json(self):
+        """Check iterative serialization gives the same JSON than to_dict(), also past recursion limit.
+
+        :return:
+        """
+        import ast
+        import json
+        import sys
+        from src.cAST import Node
+        visitor = Visitor(inbuild_imports=Origin.Buildin_Functions.INBUILD, sys_imports=list())
+        visitor.visit(ast.parse(open('tests/test_file.py').read()))
+        root = visitor.get_custom_ast().root
+        assert "".join(root.iter_json()) == json.dumps(root.to_dict())
+        assert "".join(root.iter_json((',', ':'))) == json.dumps(root.to_dict(), separators=(',', ':'))
+        depth = sys.getrecursionlimit() * 2
+        deep_root = node = Node(ast.Module())
+        for _ in range(depth):
+            child = Node(ast.UnaryOp())
+            node.set_child(child)
+            node = child
+        deep_json = "".join(deep_root.iter_json())
+        assert deep_json.count('{"CAST_type": "UnaryOp", "CAST_body": [') == depth
+        assert deep_json.endswith("[]}" + "]}" * depth)
+
+
+class TestMetadata(unittest.TestCase):
+    def test_shared_metadata(self):
+        """Check shared metadata matches the one formatted node by node and none keeps no metadata.
+
+        :return:
+        """
+        import ast
+        from src.constants import Metadata
+        tree = ast.parse(open('tests/fast_sort.py').read())
+        for metadata in Metadata.get_attr():
+            visitor = Visitor(inbuild_imports=Origin.Buildin_Functions.INBUILD, sys_imports=list(), metadata=metadata)
+            visitor.visit(tree)
+            nodes = [visitor.get_custom_ast().root]
+            while nodes:
+                node = nodes.pop()
+                nodes.extend(node.childs)
+                if node.get_metadata() is None:
+                    continue
+                assert metadata != Metadata.NONE
+                assert node.get_metadata() == Visitor._format(node.get_ast_node())
+
+
+class TestOrigin(unittest.TestCase):
+    def test_resolver(self):
+        """Check origin of modules is resolved and standard library table is memoized on disk.
+
+        :return:
+        """
+        import os
+        import tempfile
+        from src.origin import OriginResolver
+        with tempfile.TemporaryDirectory() as cache_dir:
+            resolver = OriginResolver(cache_dir=cache_dir)
+            assert os.path.isfile(resolver.get_cache_path())
+            assert OriginResolver(cache_dir=cache_dir).stdlib == resolver.stdlib
+        assert resolver.classify('os.path') == Origin.SYSTEM
+        assert resolver.classify('fast_sort', directory='tests') == Origin.USER
+        assert resolver.classify('fast_sort') == Origin.UNKNOWN
+        assert resolver.classify('not_a_module', directory='tests') == Origin.UNKNOWN
+
+    def test_classifier(self):
+        """Check dotted names get the origin of their longest known prefix, also when called through aliases.
+
+        :return:
+        """
+        from src.origin import get_classifier
+        classifier = get_classifier().bind(system=['os', 'numpy.linalg'], user=['tools.sort', 'print'])
+        assert get_classifier() is get_classifier(Origin.Buildin_Functions.INBUILD)
+        assert classifier.classify('os.path.join') == Origin.SYSTEM
+        assert classifier.classify('numpy.linalg.norm') == Origin.SYSTEM
+        assert classifier.classify('numpy.array') == Origin.UNKNOWN
+        assert classifier.classify('tools.sort.quick') == Origin.USER
+        assert classifier.classify('tools') == Origin.UNKNOWN
+        assert classifier.classify('print') == Origin.NATIVE
+        assert get_classifier().classify('os') == Origin.UNKNOWN
+        source = 'import os.path as p\nimport numpy as np\np.join("a")\nnp.array([])\nstr.join("", [])\nf()()\n'
+        _, c_ast = build(source, 'tests/test_origin.py', Mode.EXEC, Metadata.NONE)
+        origins = [node.get_attributes()[0].get('origin') for node in c_ast.nodes.values()
+                   if node.name == 'Call']
+        assert origins == [Origin.SYSTEM, Origin.UNKNOWN, Origin.NATIVE, Origin.UNKNOWN, Origin.UNKNOWN]
+
+    def test_scopes(self):
+        """Check call targets resolve to fully qualified names of the scope they are called from.
+
+        :return:
+        """
+        source = ('import json as j\n'
+                  'from os import path\n'
+                  'def f(j):\n'
+                  '    import pickle as p\n'
+                  '    j.dumps(p.dumps(1))\n'
+                  'class C:\n'
+                  '    path = None\n'
+                  '    def g(self):\n'
+                  '        return path.join("a")\n'
+                  'p.loads(j.loads(""))\n'
+                  'getcwd = lambda path: path.join()\n')
+        _, c_ast = build(source, 'tests/test_scopes.py', Mode.EXEC, Metadata.NONE)
+        origins = [node.get_attributes()[0].get('origin') for node in c_ast.nodes.values()
+                   if node.name == 'Call']
+        assert origins == [Origin.UNKNOWN, Origin.SYSTEM, Origin.SYSTEM, Origin.UNKNOWN, Origin.SYSTEM,
+                           Origin.UNKNOWN]
+        from src.symbols import SymbolTable
+        from src.constants import Scope
+        symbols = SymbolTable()
+        symbols.bind('np', 'numpy')
+        symbols.enter(Scope.FUNCTION)
+        symbols.bind('np')
+        assert symbols.resolve('np') is None
+        symbols.exit()
+        assert symbols.resolve('np') == 'numpy' and symbols.resolve('pd') == 'pd'
+
+
+class TestCorpus(unittest.TestCase):
+    def test_corpus(self):
+        """Check records appended to a corpus are read back by position, cached ones included.
+
+        :return:
+        """
+        import os
+        import tempfile
+        from src.cache import ResultCache
+        from src.corpus import CorpusReader, CorpusWriter
+        from src.dataset import analyse_dataset
+        from src.encoding import decode, encode
+        with tempfile.TemporaryDirectory() as directory:
+            corpus_file = os.path.join(directory, 'tests.cast')
+            file_list = os.path.join(directory, 'files.txt')
+            with open(file_list, 'w') as file:
+                file.write('tests/factorising.py\ntests/fast_sort.py\n')
+            cache = ResultCache(directory=directory)
+            for _ in range(2):
+                analyse_dataset(None, file_list=file_list, cache=cache, output_file=corpus_file,
+                                output_type=Output.Format.CORPUS)
+                with CorpusReader(corpus_file) as corpus:
+                    assert len(corpus) == 2
+                    assert corpus.get_name(1) == 'tests/fast_sort.py'
+                    assert decode(corpus[1]) == self.get_tree('tests/fast_sort.py')
+            _, c_ast = build(open('tests/test_empty.py').read(), 'tests/test_empty.py', Mode.EXEC, Metadata.NONE)
+            c_ast.corpusify(corpus_file, 'tests/test_empty.py')
+            with CorpusReader(corpus_file) as corpus:
+                assert len(corpus) == 3
+                assert decode(corpus[-1]) == c_ast.root.to_dict()
+                record, numpy_record = corpus[0], corpus.get(0, as_numpy=True)
+            assert decode(record) == decode(numpy_record) == self.get_tree('tests/factorising.py')
+            del record, numpy_record
+            with self.assertRaises(ValueError):
+                CorpusWriter(file_list, append=True)
+            writer = CorpusWriter(corpus_file, append=True)
+            writer.append(encode(c_ast), 'lost')
+            with CorpusReader(corpus_file) as corpus:
+                assert len(corpus) == 3
+            writer.close()
+            with CorpusReader(corpus_file) as corpus:
+                assert len(corpus) == 4 and corpus.get_name(3) == 'lost'
+            assert sorted(os.listdir(directory)) == sorted(['files.txt', 'tests.cast', Cache.RESULTS])
+
+    @staticmethod
+    def get_tree(file_path: str) -> dict:
+        _, c_ast = build(open(file_path).read(), file_path, Mode.EXEC, Metadata.NONE)
+        return c_ast.root.to_dict()
+
+
+class TestServer(unittest.TestCase):
+    def test_serve_stream(self):
+        """Check responses follow the order of requests, concurrently handled or not, and errors are answered.
+
+        :return:
+        """
+        import io
+        import json
+        from concurrent.futures import ThreadPoolExecutor
+        from src.server import serve_stream
+        requests = [json.dumps({'id': i, 'source': 'x = {}\n'.format(i)}) for i in range(8)]
+        requests.insert(3, json.dumps({'id': 'broken', 'source': 'def ('}))
+        sequential, concurrent = io.StringIO(), io.StringIO()
+        serve_stream(io.StringIO('\n'.join(requests)), sequential)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            serve_stream(io.StringIO('\n'.join(requests)), concurrent, executor, pending=2)
+        assert sequential.getvalue() == concurrent.getvalue()
+        responses = [json.loads(line) for line in concurrent.getvalue().splitlines()]
+        assert [response.get('id') for response in responses] == [0, 1, 2, 'broken', 3, 4, 5, 6, 7]
+        assert responses[3].get('error').startswith('SyntaxError')
+        assert responses[0].get('cast').get('CAST_type') == 'Module'
+
+    def test_serve_stream_failures(self):
+        """Check failures of the executor are answered and a client going away stops serving it.
+
+        :return:
+        """
+        import io
+        import json
+        from concurrent.futures import Future
+        from src.server import serve_stream
+
+        class BrokenExecutor:
+            def submit(self, function, *args):
+                future = Future()
+                future.set_exception(RuntimeError('worker died'))
+                return future
+
+        class ClosedWriter(io.StringIO):
+            def write(self, text):
+                raise BrokenPipeError('client went away')
+
+        requests = '\n'.join(json.dumps({'id': i, 'source': 'x = 1\n'}) for i in range(16))
+        output = io.StringIO()
+        serve_stream(io.StringIO(requests), output, BrokenExecutor(), pending=2)
+        responses = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert [response.get('id') for response in responses] == list(range(16))
+        assert responses[0].get('error') == 'RuntimeError: worker died'
+        reader = io.StringIO(requests)
+        serve_stream(reader, ClosedWriter(), BrokenExecutor(), pending=2)
+        assert reader.tell() < len(requests)
+
+    def test_user_modules(self):
+        """Check user modules are only resolved for requests with a filename, and looked for on each request.
+
+        :return:
+        """
+        import json
+        import os
+        import tempfile
+        from src.server import handle_request
+
+        def get_origin(source: str, **request) -> str:
+            response = json.loads(handle_request(json.dumps(dict(request, source=source))))
+            return response.get('cast').get('CAST_body')[0].get('CAST_body')[0].get('origin')
+
+        assert get_origin('import src\n') == Origin.UNKNOWN
+        assert get_origin('import src\n', filename='run.py') == Origin.USER
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'main.py')
+            assert get_origin('import helpers\n', filename=filename) == Origin.UNKNOWN
+            open(os.path.join(directory, 'helpers.py'), 'w').close()
+            assert get_origin('import helpers\n', filename=filename) == Origin.USER
+
+
+class TestLogger(unittest.TestCase):
+    def test_setup_once(self):
+        """Check loggers share the handlers set up once and debug records are dropped by default.
+
+        :return:
+        """
+        import logging
+        from src.logger import get_logger
+        first = get_logger('first')
+        handlers = list(logging.getLogger('cAST').handlers)
+        second = get_logger('second')
+        assert logging.getLogger('cAST').handlers == handlers
+        assert not first.handlers and not second.handlers
+        assert not first.isEnabledFor(logging.DEBUG)
+
+
+class TestStartup(unittest.TestCase):
+    def test_lazy_imports(self):
+        """Check importing the CLI does not import modules only needed once arguments are parsed.
+
+        :return:
+        """
+        import subprocess
+        import sys
+        code = "import sys, src.cli; print(' '.join(sorted(sys.modules)))"
+        modules = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.split()
+        for module in ['ast', 'logging', 'src.cAST_frontend', 'src.visitor', 'src.eval', 'src.dataset']:
+            assert module not in modules, module
+
+
+class TestDataset(unittest.TestCase):
+    def test_jobs(self):
+        """Check reports of a worker pool are the same as the ones of a sequential run.
+
+        :return:
+        """
+        import glob
+        from src.dataset import iter_results
+        file_paths = sorted(glob.glob('tests/*.py'))
+        sequential = {file_path: report for file_path, report, _ in iter_results(file_paths)}
+        parallel = {file_path: report for file_path, report, _ in iter_results(file_paths, jobs=2, chunksize=2)}
+        assert sequential == parallel
+        assert sequential.get('tests/test_empty.py').get('cast').get('total_nodes') == 1
+
+    def test_statistics(self):
+        """Check counters collected while building match the tree, and aggregates add up reports.
+
+        :return:
+        """
+        from src.eval import Statistics
+        statistics = Statistics()
+        reports = list()
+        for file_path in ['tests/factorising.py', 'tests/fast_sort.py']:
+            report = compress(open(file_path).read(), file_path, Mode.EXEC, Output.Format.JSON, None, True, None)
+            _, c_ast = build(open(file_path).read(), file_path, Mode.EXEC)
+            assert report.get('cast').get('histogram') == self.count_cast(c_ast.root)
+            assert sum(report.get('ast').get('depths')) == report.get('ast').get('total_nodes')
+            statistics.add(report)
+            reports.append(report)
+        assert statistics.files == 2 and statistics.get_compression_ratio() > 1
+        assert statistics.nodes.get('cast') == sum(report.get('cast').get('total_nodes') for report in reports)
+
+    @staticmethod
+    def count_cast(root) -> dict:
+        """Count appearances of each cAST node name below root, walking the tree."""
+        entities = dict()
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            entities[node.name] = entities.get(node.name, 0) + 1
+            stack.extend(node.childs)
+        return entities
+
+    def test_metrics(self):
+        """Check running metrics are written every few files and once more at the end.
+
+        :return:
+        """
+        import os
+        import tempfile
+        from src.dataset import analyse_dataset
+        with tempfile.TemporaryDirectory() as directory:
+            metrics_file = os.path.join(directory, 'metrics.csv')
+            statistics = analyse_dataset('tests', exclude=['test_*.py'], cache=None, metrics_file=metrics_file,
+                                         metrics_every=2)
+            with open(metrics_file) as file:
+                rows = [line.split(',') for line in file.read().splitlines()]
+        assert statistics.files == 4
+        assert [row[0] for row in rows] == ['files', '2', '4']
+        assert rows[-1][2] == str(statistics.nodes.get('cast'))
+
+    def test_share_subtrees(self):
+        """Check data-set runs sharing subtrees count the saved nodes, cached results included.
+
+        :return:
+        """
+        import tempfile
+        from src.cache import ResultCache
+        from src.dataset import analyse_dataset
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(directory=directory)
+            assert analyse_dataset('tests', exclude=['test_*.py'], cache=cache).shared_nodes == 0
+            shared = [analyse_dataset('tests', exclude=['test_*.py'], cache=cache, share_subtrees=True)
+                      for _ in range(2)]
+        assert shared[0].shared_nodes > 0 and shared[0].shared_nodes == shared[1].shared_nodes
+
+    def test_output_records(self):
+        """Check data-set output holds one JSON object per file, plain or gzip compressed JSON Lines.
+
+        :return:
+        """
+        import gzip
+        import json
+        import os
+        import tempfile
+        from src.dataset import analyse_dataset
+        file_paths = ['tests/factorising.py', 'tests/fast_sort.py']
+        with tempfile.TemporaryDirectory() as directory:
+            file_list = os.path.join(directory, 'files.txt')
+            with open(file_list, 'w') as file:
+                file.write('\n'.join(file_paths) + '\n')
+            for output_file, opener in [('dataset.jsonl', open), ('dataset.jsonl.gz', gzip.open)]:
+                output_file = os.path.join(directory, output_file)
+                analyse_dataset(None, file_list=file_list, output_file=output_file)
+                with opener(output_file, 'rt', encoding='utf-8') as file:
+                    records = [json.loads(line) for line in file]
+                assert sorted(record.get('path') for record in records) == file_paths
+                for record in records:
+                    assert set(record) == {'path', 'cast', 'report'}
+                    _, c_ast = build(open(record.get('path')).read(), record.get('path'), Mode.EXEC,
+                                     Metadata.NONE)
+                    assert record.get('cast') == c_ast.root.to_dict()
+                    assert record.get('report').get('cast').get('total_nodes') == sum(c_ast.entities.values())
+
+    def test_dedup(self):
+        """Check files duplicating another one, byte for byte or but for comments and blank lines, are skipped.
+
+        :return:
+        """
+        import os
+        import tempfile
+        from src.dataset import analyse_dataset
+        source = open('tests/fast_sort.py', 'rb').read()
+        with tempfile.TemporaryDirectory() as directory:
+            for name, content in [('a.py', source), ('b.py', source), ('c.py', b'# copy\n\n' + source + b'\n'),
+                                  ('d.py', open('tests/factorising.py', 'rb').read())]:
+                with open(os.path.join(directory, name), 'wb') as file:
+                    file.write(content)
+            for jobs in (1, 2):
+                statistics = analyse_dataset(directory, jobs=jobs, dedup=True)
+                assert statistics.files == 2 and statistics.duplicates == {'exact': 1, 'near': 1}
+            assert analyse_dataset(directory).files == 4
+
+    def test_discover_files(self):
+        """Check data-set files are found recursively and filtered by globs.
+
+        :return:
+        """
+        import os
+        from src.dataset import discover_files
+        found = set(discover_files('.', exclude=['.git', 'benchmarks', 'test_*.py']))
+        assert os.path.join('.', 'src', 'visitor.py') in found
+        assert os.path.join('.', 'tests', 'test.py') in found
+        assert os.path.join('.', 'tests', 'test_file.py') not in found
+        assert not any(file_path.endswith('.md') for file_path in found)
+
+    def test_cache(self):
+        """Check cached reports are reused and least recently used entries are evicted.
+
+        :return:
+        """
+        import json
+        import os
+        import tempfile
+        from src.cache import ResultCache
+        from src.dataset import analyse_file
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResultCache(directory=cache_dir)
+            report, record = analyse_file('tests/fast_sort.py', cache=cache, with_record=True)
+            assert analyse_file('tests/fast_sort.py', cache=cache, with_record=True) == (report, record)
+            key = cache.get_key(open('tests/fast_sort.py', 'rb').read(), Mode.EXEC, os.path.abspath('tests'))
+            assert cache.get(key).startswith(json.dumps(report))
+            assert json.loads(record).get('report') == report
+            assert cache.get(cache.get_key(b'', Mode.EXEC)) is None
+            cache.max_size = 0
+            assert cache.evict() == 1
+            assert cache.get(key) is None
+
+    def test_timeout(self):
+        """Check timeouts are not mistaken for cache failures and files analysed off the main thread are not skipped.
+
+        :return:
+        """
+        import tempfile
+        from concurrent.futures import ThreadPoolExecutor
+        from unittest import mock
+        from src.cache import ResultCache
+        from src.dataset import analyse_file
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            report, _ = executor.submit(analyse_file, 'tests/fast_sort.py', 60).result()
+        assert report == analyse_file('tests/fast_sort.py', 60)[0]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResultCache(directory=cache_dir)
+            cache.put('key', 'value')
+            with mock.patch('os.utime', side_effect=TimeoutError), self.assertRaises(TimeoutError):
+                cache.get('key')
+            with mock.patch('os.replace', side_effect=TimeoutError), self.assertRaises(TimeoutError):
+                cache.put('key', 'other value')
+            assert cache.get('key') == 'value'
+
+    def test_cache_user_modules(self):
+        """Check cached results are not reused once a module imported by the file appears next to it.
+
+        :return:
+        """
+        import json
+        import os
+        import tempfile
+        from src.cache import ResultCache
+        from src.dataset import analyse_file
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'main.py')
+            with open(file_path, 'w') as file:
+                file.write('import utils\nutils.run()\n')
+            cache = ResultCache(directory=os.path.join(directory, 'cache'))
+            _, record = analyse_file(file_path, cache=cache, with_record=True)
+            assert '"origin": "UNK"' in json.dumps(json.loads(record).get('cast'))
+            with open(os.path.join(directory, 'utils.py'), 'w') as file:
+                file.write('def run():\n    pass\n')
+            _, record = analyse_file(file_path, cache=cache, with_record=True)
+            assert '"origin": "UNK"' not in json.dumps(json.loads(record).get('cast'))
+            assert analyse_file(file_path, cache=cache, with_record=True)[1] == record
+
 
 if __name__ == '__main__':
     unittest.main()